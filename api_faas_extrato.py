@@ -17,7 +17,7 @@ import time
 import json
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 # Ajusta o sys.path para módulos utilitários
 ROOT_PATH = Path(__file__).resolve().parents[2]
@@ -28,6 +28,7 @@ from dotenv import load_dotenv
 from utils.date_utils import get_business_day
 from utils.logging_utils import Log, LogLevel
 from utils.backoff_utils import with_backoff_jitter
+from utils.json_utils import emit_metrics
 
 # Configuração de logs centralizada e sincronizada
 LOGS_DIR = Path(__file__).parent / "logs"
@@ -395,7 +396,7 @@ def download_extrato_json_intelligent(token: str, ticket: str, output_dir: Path,
     logger.error(f"❌ Falha após {max_attempts} tentativas")
     return False
 
-def main(date_str: str, base_output: Path) -> int:
+def main(date_str: str, base_output: Path, metrics_out: Optional[str] = None) -> int:
     """
     Fluxo principal com detecção inteligente de disponibilidade de dados.
     """
@@ -413,7 +414,7 @@ def main(date_str: str, base_output: Path) -> int:
             "duracao_segundos": 0,
             "erros": [f"Data {date_str} inválida: {warning_msg}"]
         }
-        print(json.dumps(metrics, ensure_ascii=False))
+        emit_metrics(metrics, metrics_out)
         return 0
     
     if warning_msg:
@@ -540,7 +541,7 @@ def main(date_str: str, base_output: Path) -> int:
             "erros": []
         }
         
-        print(json.dumps(metrics, ensure_ascii=False))
+        emit_metrics(metrics, metrics_out)
         return total_files
 
     except Exception as e:
@@ -562,7 +563,7 @@ def main(date_str: str, base_output: Path) -> int:
             "erros": [error_msg]
         }
         
-        print(json.dumps(metrics, ensure_ascii=False))
+        emit_metrics(metrics, metrics_out)
         return 0
 
 if __name__ == '__main__':
@@ -576,6 +577,12 @@ if __name__ == '__main__':
         default=os.getenv('OUTPUT_DIR_BASE', 'output'),
         help='Diretório base onde ficarão as pastas "extrato"'
     )
+    parser.add_argument(
+        '--metrics-out',
+        type=str,
+        default=None,
+        help='Arquivo onde gravar o JSON de métricas (lido pelo orquestrador)'
+    )
     args = parser.parse_args()
 
     # Log de inicialização
@@ -605,13 +612,13 @@ if __name__ == '__main__':
             "duracao_segundos": 0,
             "erros": [error_msg]
         }
-        print(json.dumps(error_metrics, ensure_ascii=False))
+        emit_metrics(error_metrics, args.metrics_out)
         sys.exit(1)
 
     base_out = Path(args.output_dir_base)
     logger.info(f"📂 Diretório base de saída: {base_out}")
     
-    result = main(d, base_out)
+    result = main(d, base_out, args.metrics_out)
     
     logger.info(f"🏁 === SCRIPT FINALIZADO ===")
     logger.info(f"📊 Resultado: {result} arquivo(s) extraído(s)")
@@ -20,6 +20,7 @@ import json
 import re
 import sys
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
 
@@ -30,6 +31,7 @@ if str(ROOT_PATH) not in sys.path:
 from utils.date_utils import get_business_day
 from utils.logging_utils import Log, LogLevel
 from utils.backoff_utils import with_backoff_jitter
+from utils.json_utils import emit_metrics
 
 
 LOGS_DIR = Path(__file__).parent / "logs"
@@ -191,12 +193,13 @@ def extract_zip(zip_path: Path, out_dir: Path, remove_zip: bool = True) -> int:
     logger.info(f"Extraídos {count} arquivos para {out_dir}")
     return count
 
-def main(date_str: str, base_output: Path) -> int:
+def main(date_str: str, base_output: Path, metrics_out: Optional[str] = None) -> int:
     """
     Fluxo principal com saída JSON corrigida para o orquestrador.
     """
     logger.info(f"Processando data: {date_str}")
-    raw_dir = base_output / "raw"
+    # ZIP em raw/<data>: com datas em paralelo, cada extração só enxerga os próprios arquivos
+    raw_dir = base_output / "raw" / date_str
     extracted_dir = base_output / "extracted" / date_str
 
     raw_dir.mkdir(parents=True, exist_ok=True)
@@ -225,7 +228,7 @@ def main(date_str: str, base_output: Path) -> int:
         }
         
         logger.info(f"Extração concluída com sucesso: {total_files} arquivos em {duracao}s")
-        print(json.dumps(metrics, ensure_ascii=False))
+        emit_metrics(metrics, metrics_out)
         return total_files
 
     except Exception as e:
@@ -243,7 +246,7 @@ def main(date_str: str, base_output: Path) -> int:
             "erros": [error_msg]
         }
         
-        print(json.dumps(metrics, ensure_ascii=False))
+        emit_metrics(metrics, metrics_out)
         return 0
 
 if __name__ == '__main__':
@@ -257,6 +260,12 @@ if __name__ == '__main__':
         default=os.getenv('OUTPUT_DIR_BASE', 'output'),
         help='Diretório base onde ficarão as pastas "raw" e "extracted"'
     )
+    parser.add_argument(
+        '--metrics-out',
+        type=str,
+        default=None,
+        help='Arquivo onde gravar o JSON de métricas (lido pelo orquestrador)'
+    )
     args = parser.parse_args()
 
     try:
@@ -277,9 +286,9 @@ if __name__ == '__main__':
             "duracao_segundos": 0,
             "erros": [f"Data inválida: {str(e)}"]
         }
-        print(json.dumps(error_metrics, ensure_ascii=False))
+        emit_metrics(error_metrics, args.metrics_out)
         sys.exit(1)
 
     base_out = Path(args.output_dir_base)
-    result = main(d, base_out)
+    result = main(d, base_out, args.metrics_out)
     sys.exit(0 if result > 0 else 1)
\ No newline at end of file
@@ -27,6 +27,7 @@ if str(ROOT_DIR) not in sys.path:
 from dotenv import load_dotenv
 from utils.logging_utils import Log, LogLevel
 from utils.backoff_utils import with_backoff_jitter
+from utils.json_utils import emit_metrics
 from utils.date_utils import get_business_day
 
 # Configuração de logs
@@ -259,6 +260,10 @@ def main():
         "--date", type=str, default=None,
         help="Data de referência (YYYY-MM-DD). Se não informada, usa ontem útil."
     )
+    parser.add_argument(
+        "--metrics-out", type=str, default=None,
+        help="Arquivo onde gravar o JSON de métricas (lido pelo orquestrador)."
+    )
     args = parser.parse_args()
 
     start_time = time.time()
@@ -301,7 +306,7 @@ def main():
             "erros": [str(e)],
             "duracao_segundos": duracao
         }
-        print(json.dumps(fallback, ensure_ascii=False))
+        emit_metrics(fallback, args.metrics_out)
         sys.exit(1)
 
     # 4) Baixar as páginas de JSON (aumentei para 5 páginas e melhorei a lógica)
@@ -367,7 +372,7 @@ def main():
             "erros": ["Nenhum JSON gerado."],
             "duracao_segundos": duracao_total
         }
-        print(json.dumps(fallback, ensure_ascii=False))
+        emit_metrics(fallback, args.metrics_out)
         sys.exit(1)
 
     # Sucesso
@@ -382,7 +387,7 @@ def main():
         "erros": [],
         "duracao_segundos": duracao_total
     }
-    print(json.dumps(metrics, ensure_ascii=False))
+    emit_metrics(metrics, args.metrics_out)
     sys.exit(0)
 
 if __name__ == "__main__":
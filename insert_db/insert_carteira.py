@@ -34,7 +34,7 @@ from dotenv import load_dotenv
 
 from utils.logging_utils import Log, LogLevel
 from utils.mysql_connector_utils import MySQLConnector, QueryError
-from utils.json_utils import ConfigValidator, InvalidJsonError
+from utils.json_utils import ConfigValidator, InvalidJsonError, emit_metrics
 
 # —————————————————————————————————————————————————————————————
 # Configuração de logs (mantida do original)
@@ -508,6 +508,7 @@ def main():
     parser = argparse.ArgumentParser(description="Script de inserção de carteira BTG no MySQL")
     parser.add_argument('--date', '-d', dest='date_ref', required=True, help='Data de referência (YYYY-MM-DD)')
     parser.add_argument('--input-dir', '-i', dest='input_dir', required=True, help='Diretório de entrada com os arquivos')
+    parser.add_argument('--metrics-out', dest='metrics_out', default=None, help='Arquivo onde gravar o JSON de métricas')
     args = parser.parse_args()
 
     date_ref  = args.date_ref
@@ -578,7 +579,7 @@ def main():
         "detalhamento": detalhamento_por_arquivo
     }
 
-    print(json.dumps(output_metrics, default=str))
+    emit_metrics(output_metrics, args.metrics_out, default=str)
     sys.exit(0)
 
 if __name__ == "__main__":
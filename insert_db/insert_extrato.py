@@ -28,7 +28,7 @@ if str(ROOT_DIR) not in sys.path:
 
 from utils.logging_utils import Log, LogLevel
 from utils.mysql_connector_utils import MySQLConnector, QueryError
-from utils.json_utils import ConfigValidator, InvalidJsonError
+from utils.json_utils import ConfigValidator, InvalidJsonError, emit_metrics
 
 # Configuração de logs
 LOGS_DIR = Path(__file__).parent / "logs"
@@ -390,6 +390,8 @@ def main():
                         help="Executa sem prompt interativo.")
     parser.add_argument("--chunk-size", type=int, default=5000,
                         help="Tamanho dos lotes para inserção (padrão: 5000)")
+    parser.add_argument("--metrics-out", type=str, default=None,
+                        help="Arquivo onde gravar o JSON de métricas (lido pelo orquestrador)")
     parser.add_argument("--debug", action="store_true",
                         help="Ativa modo debug com logs detalhados")
     args = parser.parse_args()
@@ -407,7 +409,7 @@ def main():
             "detalhamento": [],
             "erros": [error_msg]
         }
-        print(json.dumps(metrics_fail, ensure_ascii=False))
+        emit_metrics(metrics_fail, args.metrics_out)
         sys.exit(1)
 
     start_total = time.time()
@@ -450,7 +452,7 @@ def main():
             "detalhamento": [],
             "erros": [error_msg]
         }
-        print(json.dumps(metrics_fail, ensure_ascii=False))
+        emit_metrics(metrics_fail, args.metrics_out)
         sys.exit(1)
 
     try:
@@ -468,7 +470,7 @@ def main():
                 "detalhamento": detalhes,
                 "erros": []
             }
-            print(json.dumps(metrics_no_data, ensure_ascii=False))
+            emit_metrics(metrics_no_data, args.metrics_out)
             sys.exit(0)
 
         # Consolidar DataFrames
@@ -536,7 +538,7 @@ def main():
             "erros": []
         }
 
-        print(json.dumps(metrics_out, ensure_ascii=False))
+        emit_metrics(metrics_out, args.metrics_out)
         sys.exit(0 if status_geral == "SUCESSO" else 1)
 
     except Exception as e:
@@ -558,7 +560,7 @@ def main():
             "erros": [error_msg]
         }
 
-        print(json.dumps(metrics_error, ensure_ascii=False))
+        emit_metrics(metrics_error, args.metrics_out)
         sys.exit(1)
 
     finally:
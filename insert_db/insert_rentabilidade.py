@@ -15,13 +15,23 @@ import argparse
 import glob
 import time
 import tempfile
-import psutil
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
 import pandas as pd
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 # Ajustar ROOT_DIR para que utils fique disponível
 ROOT_DIR = Path(__file__).resolve().parents[3]
 if str(ROOT_DIR) not in sys.path:
@@ -29,6 +39,7 @@ if str(ROOT_DIR) not in sys.path:
 
 from utils.logging_utils import Log, LogLevel
 from utils.mysql_connector_utils import MySQLConnector, QueryError
+from utils.json_utils import emit_metrics
 
 # Configuração de logs
 LOGS_DIR = Path(__file__).parent / "logs"
@@ -45,8 +56,37 @@ load_dotenv()
 
 MYSQL_TABLE = os.getenv("DB_RENTABILIDADE")
 
+# Campos escalares de cada registro, buscados em uma única chamada C
+REC_FIELDS = (
+    "account", "cnpj", "referenceDate", "liquidQuote", "rawQuote",
+    "assetValue", "numberOfQuotes", "acquisitions", "redemptions", "hierarchyClass"
+)
+REC_KEYS = itemgetter(*REC_FIELDS)
+
+# Backend pyarrow nos DataFrames por arquivo; desligado (com um único aviso) se o
+# pyarrow faltar ou não for aceito pelo pandas, mantendo o backend numpy
+_use_pyarrow_backend = True
+
+# Ordem das colunas na tabela MySQL de rentabilidade
+MYSQL_COL_ORDER = (
+    "NmFundo", "CdConta", "DocFundo", "DtPosicao", "VlrCotacao", "VlrCotacaoBruta",
+    "VlrPatrimonio", "QtdCota", "VlrAplicacao", "VlrResgate", "RentDia", "RentMes",
+    "RentAno", "RentDiaVsCDI", "RentMesVsCDI", "RentAnoVsCDI", "TpClasse"
+)
+
+# Colunas do DataFrame intermediário (tabela + arquivo de origem)
+DF_COLUMNS = MYSQL_COL_ORDER + ("arquivo_origem",)
+
 def get_memory_usage_mb() -> float:
-    """Retorna o uso atual de memória em MB."""
+    """Retorna o pico de memória residente do processo em MB (getrusage, sem psutil)."""
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        if sys.platform == "darwin":
+            return max_rss / 1024 / 1024
+        return max_rss / 1024
+
+    import psutil
     process = psutil.Process(os.getpid())
     return process.memory_info().rss / 1024 / 1024
 
@@ -74,19 +114,99 @@ def converter_porcentagem_para_decimal(valor):
     except (ValueError, TypeError):
         return None
 
-def processar_json_rentabilidade(file_path: str, debug: bool = False) -> pd.DataFrame:
+def extrair_registros(result_data: List[Any], file_name: str) -> List[tuple]:
+    """
+    Percorre os fundos do campo 'result' e retorna uma tupla por registro,
+    na ordem de DF_COLUMNS. Não depende de pandas: é o laço quente do parser.
+    """
+    resultados: List[tuple] = []
+    for i, fundo in enumerate(result_data):
+        if not isinstance(fundo, dict):
+            logger.warning("Fundo %d não é um dicionário", i)
+            continue
+            
+        nome_fundo = fundo.get("fundName", "")
+        if not nome_fundo:
+            logger.warning("Fundo %d sem nome", i)
+            continue
+            
+        fund_data = fundo.get("data", [])
+        if not isinstance(fund_data, list) or len(fund_data) == 0:
+            logger.info("Fundo %r sem dados", nome_fundo)
+            continue
+            
+        for j, registro in enumerate(fund_data):
+            # Payloads do BTG são bem formados: um único try por registro
+            # substitui as checagens isinstance aninhadas.
+            try:
+                # Extrair rentabilidade nominal
+                profitability = registro.get("profitability") or {}
+                rent_day = converter_porcentagem_para_decimal(profitability.get("day"))
+                rent_month = converter_porcentagem_para_decimal(profitability.get("month"))
+                rent_year = converter_porcentagem_para_decimal(profitability.get("year"))
+
+                # Extrair rentabilidade vs CDI
+                quota_diff = registro.get("quotaProfitabilityDifference") or {}
+                cdie_data = quota_diff.get("CDIE") or {}
+                nominal_vs_indexador = cdie_data.get("NominalVsIndexador") or {}
+                rent_vs_cdi_day = converter_porcentagem_para_decimal(nominal_vs_indexador.get("Day"))
+                rent_vs_cdi_month = converter_porcentagem_para_decimal(nominal_vs_indexador.get("Month"))
+                rent_vs_cdi_year = converter_porcentagem_para_decimal(nominal_vs_indexador.get("Year"))
+
+                # Extrair campos escalares do registro
+                try:
+                    (conta, cnpj, data_ref, vlr_cotacao, vlr_cotacao_bruta, vlr_patrimonio,
+                     qtd_cota, vlr_aplicacao, vlr_resgate, tp_classe) = REC_KEYS(registro)
+                except KeyError:
+                    # Registro incompleto: caminho tolerante com .get()
+                    (conta, cnpj, data_ref, vlr_cotacao, vlr_cotacao_bruta, vlr_patrimonio,
+                     qtd_cota, vlr_aplicacao, vlr_resgate, tp_classe) = (registro.get(k) for k in REC_FIELDS)
+
+                # Extrair data de referência
+                if data_ref and "T" in data_ref:
+                    data_ref = data_ref.split("T")[0]
+
+                resultados.append((
+                    nome_fundo, conta, cnpj, data_ref, vlr_cotacao, vlr_cotacao_bruta,
+                    vlr_patrimonio, qtd_cota, vlr_aplicacao, vlr_resgate,
+                    rent_day, rent_month, rent_year,
+                    rent_vs_cdi_day, rent_vs_cdi_month, rent_vs_cdi_year,
+                    tp_classe, file_name
+                ))
+                
+            except (TypeError, KeyError, AttributeError) as e:
+                logger.warning("Registro %d do fundo %r com estrutura inválida: %s", j, nome_fundo, e)
+                continue
+
+    return resultados
+
+def _to_pyarrow_backend(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte para o backend pyarrow (strings em buffers UTF-8 contíguos e concat mais barato)."""
+    global _use_pyarrow_backend
+    if not _use_pyarrow_backend:
+        return df
+    try:
+        if pyarrow is None:
+            raise ImportError("pyarrow não instalado")
+        return df.convert_dtypes(dtype_backend="pyarrow")
+    except ImportError as e:
+        _use_pyarrow_backend = False
+        logger.warning(f"Backend pyarrow indisponível ({e}); DataFrames seguem no backend numpy")
+        return df
+
+def processar_json_rentabilidade(file_path: str, debug: bool = False,
+                                 file_name: Optional[str] = None) -> pd.DataFrame:
     """
     Processa um arquivo JSON de rentabilidade e retorna um DataFrame estruturado.
     Versão corrigida para lidar melhor com estruturas de JSON variadas.
     """
+    file_name = file_name or os.path.basename(file_path)
     try:
-        logger.info(f"Processando arquivo JSON: {Path(file_path).name}")
+        logger.info(f"Processando arquivo JSON: {file_name}")
         
         with open(file_path, "r", encoding="utf-8") as f:
             data = json.load(f)
 
-        resultados = []
-        
         # Verificar se o JSON tem a estrutura esperada
         if not isinstance(data, dict):
             logger.warning(f"JSON não é um dicionário: {file_path}")
@@ -102,92 +222,23 @@ def processar_json_rentabilidade(file_path: str, debug: bool = False) -> pd.Data
             logger.info(f"JSON sem dados de fundos: {file_path}")
             return pd.DataFrame()
             
-        logger.info(f"Processando {len(result_data)} fundos do arquivo {Path(file_path).name}")
+        logger.info(f"Processando {len(result_data)} fundos do arquivo {file_name}")
 
-        for i, fundo in enumerate(result_data):
-            if not isinstance(fundo, dict):
-                logger.warning(f"Fundo {i} não é um dicionário")
-                continue
-                
-            nome_fundo = fundo.get("fundName", "")
-            if not nome_fundo:
-                logger.warning(f"Fundo {i} sem nome")
-                continue
-                
-            fund_data = fundo.get("data", [])
-            if not isinstance(fund_data, list) or len(fund_data) == 0:
-                logger.info(f"Fundo '{nome_fundo}' sem dados")
-                continue
-                
-            for j, registro in enumerate(fund_data):
-                if not isinstance(registro, dict):
-                    logger.warning(f"Registro {j} do fundo '{nome_fundo}' não é um dicionário")
-                    continue
-                    
-                try:
-                    # Extrair rentabilidade nominal
-                    profitability = registro.get("profitability", {})
-                    rent_day = converter_porcentagem_para_decimal(profitability.get("day"))
-                    rent_month = converter_porcentagem_para_decimal(profitability.get("month"))
-                    rent_year = converter_porcentagem_para_decimal(profitability.get("year"))
-
-                    # Extrair rentabilidade vs CDI
-                    rent_vs_cdi_day = None
-                    rent_vs_cdi_month = None
-                    rent_vs_cdi_year = None
-                    
-                    quota_diff = registro.get("quotaProfitabilityDifference", {})
-                    if isinstance(quota_diff, dict):
-                        cdie_data = quota_diff.get("CDIE", {})
-                        if isinstance(cdie_data, dict):
-                            nominal_vs_indexador = cdie_data.get("NominalVsIndexador", {})
-                            if isinstance(nominal_vs_indexador, dict):
-                                rent_vs_cdi_day = converter_porcentagem_para_decimal(nominal_vs_indexador.get("Day"))
-                                rent_vs_cdi_month = converter_porcentagem_para_decimal(nominal_vs_indexador.get("Month"))
-                                rent_vs_cdi_year = converter_porcentagem_para_decimal(nominal_vs_indexador.get("Year"))
-
-                    # Extrair data de referência
-                    data_ref = registro.get("referenceDate", "")
-                    if data_ref and "T" in data_ref:
-                        data_ref = data_ref.split("T")[0]
-
-                    row = {
-                        "NmFundo": nome_fundo,
-                        "CdConta": registro.get("account"),
-                        "DocFundo": registro.get("cnpj"),
-                        "DtPosicao": data_ref,
-                        "VlrCotacao": registro.get("liquidQuote"),
-                        "VlrCotacaoBruta": registro.get("rawQuote"),
-                        "VlrPatrimonio": registro.get("assetValue"),
-                        "QtdCota": registro.get("numberOfQuotes"),
-                        "VlrAplicacao": registro.get("acquisitions"),
-                        "VlrResgate": registro.get("redemptions"),
-                        "RentDia": rent_day,
-                        "RentMes": rent_month,
-                        "RentAno": rent_year,
-                        "RentDiaVsCDI": rent_vs_cdi_day,
-                        "RentMesVsCDI": rent_vs_cdi_month,
-                        "RentAnoVsCDI": rent_vs_cdi_year,
-                        "TpClasse": registro.get("hierarchyClass"),
-                        "arquivo_origem": Path(file_path).name
-                    }
-                    resultados.append(row)
-                    
-                except Exception as e:
-                    logger.error(f"Erro ao processar registro {j} do fundo '{nome_fundo}': {e}")
-                    continue
+        resultados = extrair_registros(result_data, file_name)
 
         if not resultados:
             logger.info(f"Nenhum registro válido extraído de {file_path}")
             return pd.DataFrame()
 
-        df = pd.DataFrame(resultados)
+        df = pd.DataFrame.from_records(resultados, columns=list(DF_COLUMNS))
         
         # Garantir o formato de data
         if "DtPosicao" in df.columns:
             df["DtPosicao"] = pd.to_datetime(df["DtPosicao"], errors="coerce").dt.strftime("%Y-%m-%d")
+
+        df = _to_pyarrow_backend(df)
             
-        logger.info(f"Extraídos {len(df)} registros do arquivo {Path(file_path).name}")
+        logger.info(f"Extraídos {len(df)} registros do arquivo {file_name}")
         return df
 
     except Exception as e:
@@ -202,8 +253,12 @@ def bulk_insert_rentabilidade_optimized(df_all: pd.DataFrame, conn: MySQLConnect
     start_insert = time.time()
     
     try:
-        # Remove a coluna arquivo_origem antes da inserção
-        df_insert = df_all.drop(columns=['arquivo_origem'], errors='ignore')
+        # Remove a coluna arquivo_origem e alinha à ordem das colunas da tabela
+        df_insert = df_all.reindex(columns=list(MYSQL_COL_ORDER), copy=False)
+
+        # O conector serializa objetos Python: volta do backend pyarrow e troca pd.NA por None
+        df_insert = df_insert.astype(object)
+        df_insert = df_insert.where(df_insert.notna(), None)
         
         # Usar o método otimizado do connector para inserção em lote
         inserted_count = conn.execute_dataframe_insert(
@@ -240,11 +295,11 @@ def process_all_files_optimized(pasta_json: Path) -> tuple[List[pd.DataFrame], L
     start_processing = time.time()
     
     for arquivo in arquivos_json:
-        nome_arquivo = Path(arquivo).name
+        nome_arquivo = os.path.basename(arquivo)
         t0 = time.time()
         
         try:
-            df_parcial = processar_json_rentabilidade(arquivo)
+            df_parcial = processar_json_rentabilidade(arquivo, file_name=nome_arquivo)
             t1 = time.time()
             dur_arquivo = round(t1 - t0, 3)
 
@@ -307,6 +362,8 @@ def main():
                         help="Executa sem prompt interativo.")
     parser.add_argument("--chunk-size", type=int, default=5000,
                         help="Tamanho dos lotes para inserção (padrão: 5000)")
+    parser.add_argument("--metrics-out", type=str, default=None,
+                        help="Arquivo onde gravar o JSON de métricas (lido pelo orquestrador)")
     args = parser.parse_args()
 
     pasta_json = Path(args.json_dir)
@@ -322,7 +379,7 @@ def main():
             "detalhamento": [],
             "erros": [error_msg]
         }
-        print(json.dumps(metrics_fail, ensure_ascii=False))
+        emit_metrics(metrics_fail, args.metrics_out)
         sys.exit(1)
 
     start_total = time.time()
@@ -343,7 +400,7 @@ def main():
             "detalhamento": [],
             "erros": [error_msg]
         }
-        print(json.dumps(metrics_fail, ensure_ascii=False))
+        emit_metrics(metrics_fail, args.metrics_out)
         sys.exit(1)
 
     try:
@@ -362,7 +419,7 @@ def main():
                 "detalhamento": detalhes,
                 "erros": []
             }
-            print(json.dumps(metrics_no_data, ensure_ascii=False))
+            emit_metrics(metrics_no_data, args.metrics_out)
             sys.exit(0)
 
         # Consolidar todos os DataFrames
@@ -434,7 +491,7 @@ def main():
             "erros": erros_gerais
         }
 
-        print(json.dumps(metrics_out, ensure_ascii=False))
+        emit_metrics(metrics_out, args.metrics_out)
         sys.exit(0)
 
     except Exception as e:
@@ -456,7 +513,7 @@ def main():
             "erros": [error_msg]
         }
 
-        print(json.dumps(metrics_error, ensure_ascii=False))
+        emit_metrics(metrics_error, args.metrics_out)
         sys.exit(1)
 
     finally:
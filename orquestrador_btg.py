@@ -10,13 +10,32 @@ Versão: 1.4.0 (Corrigido processamento de range de datas e logs sincronizados)
 
 import os
 import argparse
+import atexit
+import logging
 import subprocess
 import datetime
 import json
 import sys
+import time
+import traceback
+from collections import deque
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
+from types import MappingProxyType
 from dotenv import load_dotenv
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Ajusta o sys.path para importar módulos da raiz do projeto
 ROOT_PATH = Path(__file__).resolve().parents[2]
@@ -26,6 +45,8 @@ if str(ROOT_PATH) not in sys.path:
 from utils.logging_utils import Log, LogLevel
 from utils.notification_manager import NotificationManager, NotificationType, TemplateNotification
 from utils.date_utils import get_business_day
+from utils.mysql_connector_utils import MySQLConnector
+from utils.report_rows import build_processing_rows
 
 # Configuração de logs centralizada e sincronizada
 LOGS_DIR = Path(__file__).parent / "logs"
@@ -38,6 +59,8 @@ hoje_str = datetime.datetime.now().strftime('%Y%m%d')
 log_filename = f"orquestrador_btg_{hoje_str}.log"
 log_file_path = LOGS_DIR / log_filename
 Log.set_log_file(str(log_file_path), append=True, max_size_mb=10.0)
+# Saída dos filhos gera muitas linhas: grava o arquivo em lotes (erros forçam a gravação)
+Log.set_file_buffer(capacity=512)
 
 logger = Log.get_logger(__name__)
 
@@ -50,10 +73,66 @@ RECEIVER_EMAIL = [
     e.strip() for e in os.getenv("RECEIVER_EMAIL", "").split(",") if e.strip()
 ]
 
-notification_manager = NotificationManager()
+# Uma só conexão SMTP para os emails de erro e o relatório final
+notification_manager = NotificationManager(smtp_keepalive=True)
+atexit.register(notification_manager.close)
 EMAIL_TEMPLATES_DIR = ROOT_PATH / "configs" / "templates"
 EMAIL_TEMPLATES_DIR.mkdir(parents=True, exist_ok=True)
 
+# Scripts das etapas, resolvidos uma única vez; a existência é verificada no import
+API_BTG_DIR = ROOT_PATH / "backend" / "api_btg"
+_SCRIPTS = {
+    "api_faas_portfolio": Path(__file__).parent / "api_faas_portfolio.py",
+    "api_faas_rent": API_BTG_DIR / "api_faas_rentabilidade.py",
+    "api_faas_extrato": API_BTG_DIR / "api_faas_extrato.py",
+    "insert_carteira": API_BTG_DIR / "insert_db" / "insert_carteira.py",
+    "insert_rent": API_BTG_DIR / "insert_db" / "insert_rentabilidade.py",
+    "insert_extrato": API_BTG_DIR / "insert_db" / "insert_extrato.py",
+}
+_MISSING_SCRIPTS = frozenset(name for name, path in _SCRIPTS.items() if not path.is_file())
+
+# Dias úteis de vw_calendario (array ordenado datetime64[D]) e a janela (início, fim)
+# consultada por _load_business_days; _BIZ_DAYS fica None se o banco falhou
+_BIZ_DAYS: Optional["np.ndarray"] = None
+_BIZ_WINDOW: Optional[Tuple[datetime.date, datetime.date]] = None
+
+def _load_business_days(run_start: datetime.date, run_end: datetime.date) -> Optional["np.ndarray"]:
+    """
+    Carrega os dias úteis de vw_calendario entre run_start - 1 ano e run_end + 1 ano
+    como array ordenado datetime64[D], guardado em _BIZ_DAYS/_BIZ_WINDOW para as
+    consultas seguintes. Retorna None se o banco falhar.
+    """
+    global _BIZ_DAYS, _BIZ_WINDOW
+    inicio = run_start - datetime.timedelta(days=366)
+    fim = run_end + datetime.timedelta(days=366)
+
+    query = '''
+    SELECT DtReferencia
+    FROM vw_calendario
+    WHERE DtReferencia BETWEEN %s AND %s
+      AND Feriado = 0
+      AND FimSemana = 0
+    ORDER BY DtReferencia
+    '''
+
+    # Consulta única por processo: o conector é fechado logo em seguida
+    connector = None
+    try:
+        connector = MySQLConnector.from_env()
+        results = connector.execute_query(query, (inicio.isoformat(), fim.isoformat()))
+    except Exception as e:
+        logger.warning(f"Erro ao consultar calendário no banco: {e}")
+        _BIZ_DAYS, _BIZ_WINDOW = None, (inicio, fim)
+        return None
+    finally:
+        if connector is not None:
+            connector.close()
+
+    business_days = np.array([row['DtReferencia'] for row in results], dtype='datetime64[D]')
+    logger.info(f"Calendário carregado: {business_days.size} dias úteis entre {inicio} e {fim}")
+    _BIZ_DAYS, _BIZ_WINDOW = business_days, (inicio, fim)
+    return business_days
+
 def generate_business_days_range(start_date: str, end_date: str) -> List[str]:
     """
     Gera uma lista de dias úteis entre duas datas (inclusivo).
@@ -78,38 +157,32 @@ def generate_business_days_range(start_date: str, end_date: str) -> List[str]:
         
         logger.info(f"Gerando dias úteis entre {start_date} e {end_date} ({delta_days} dias)")
         
-        try:
-            from utils.mysql_connector_utils import MySQLConnector
-            
-            connector = MySQLConnector.from_env()
-            
-            query = '''
-            SELECT DtReferencia
-            FROM vw_calendario
-            WHERE DtReferencia BETWEEN %s AND %s
-              AND Feriado = 0
-              AND FimSemana = 0
-            ORDER BY DtReferencia
-            '''
-            
-            results = connector.execute_query(query, (start_date, end_date))
-            business_days = [row['DtReferencia'].strftime('%Y-%m-%d') for row in results]
-            
-            connector.close()
-            
-            logger.info(f"Encontrados {len(business_days)} dias úteis no período")
-            return business_days
+        if np is not None:
+            # Janela carregada no início da execução (main); período fora dela é consultado de novo
+            if _BIZ_WINDOW is not None and _BIZ_WINDOW[0] <= start_dt and end_dt <= _BIZ_WINDOW[1]:
+                biz_days = _BIZ_DAYS
+            else:
+                biz_days = _load_business_days(start_dt, end_dt)
             
-        except Exception as e:
-            logger.warning(f"Erro ao consultar banco para dias úteis: {e}")
-            logger.info("Usando fallback com pandas para gerar dias úteis")
+            start64, end64 = np.datetime64(start_dt, 'D'), np.datetime64(end_dt, 'D')
+            if biz_days is not None:
+                # Calendário ordenado: o intervalo é uma fatia, sem consulta ao banco
+                lo = np.searchsorted(biz_days, start64, side='left')
+                hi = np.searchsorted(biz_days, end64, side='right')
+                business_days = biz_days[lo:hi].astype(str).tolist()
+            else:
+                logger.warning("Calendário indisponível, usando apenas fins de semana (feriados não serão excluídos)")
+                dates = np.arange(start64, end64 + 1, dtype='datetime64[D]')
+                business_days = dates[np.is_busday(dates)].astype(str).tolist()
+        else:
+            logger.info("numpy indisponível, usando pandas para gerar dias úteis")
             
             import pandas as pd
             dates = pd.date_range(start=start_date, end=end_date, freq='B')
             business_days = [date.strftime('%Y-%m-%d') for date in dates]
-            
-            logger.info(f"Fallback gerou {len(business_days)} dias úteis")
-            return business_days
+        
+        logger.info(f"Encontrados {len(business_days)} dias úteis no período")
+        return business_days
         
     except ValueError as e:
         logger.error(f"Erro ao gerar range de datas: {e}")
@@ -118,37 +191,105 @@ def generate_business_days_range(start_date: str, end_date: str) -> List[str]:
         logger.error(f"Erro inesperado ao gerar dias úteis: {e}")
         raise
 
-def run_command(command: List[str], step_name: str, log_output: bool = True) -> Tuple[int, str]:
-    """Executa um comando externo via subprocess, capturando stdout+stderr."""
+def run_command(command: List[str], step_name: str, log_output: bool = True,
+                log_every: int = 50) -> Tuple[int, bytes]:
+    """
+    Executa um comando externo via subprocess, capturando stdout+stderr.
+    A saída é lida do pipe em blocos de 64 KB; apenas 1 a cada `log_every` linhas
+    vai para o log, e as últimas 200 linhas são despejadas em caso de falha.
+    Retorna a saída bruta (bytes); só é decodificada se alguém precisar do texto.
+
+    As etapas rodam como processos filhos (e não via import) porque cada script
+    reconfigura o singleton Log para o próprio arquivo no import e encerra com
+    sys.exit; importá-los aqui redirecionaria o log do orquestrador.
+    """
     logger.info(f"=== EXECUTANDO: {step_name} ===")
     logger.info(f"Comando: {' '.join(command)}")
     
+    # close_fds=False (sem cwd/preexec_fn) permite ao CPython usar posix_spawn
+    # em vez de fork+exec; os fds abertos pelo Python já são não-herdáveis.
     proc = subprocess.Popen(
         command,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
-        encoding='utf-8',
-        errors='replace'
+        close_fds=False
     )
     
-    out_lines = []
-    for ln in proc.stdout:
-        line_stripped = ln.strip()
-        if line_stripped:  # Só loga linhas não vazias
-            if log_output:
-                logger.info(f"[{step_name}] {line_stripped}")
-            out_lines.append(ln)
+    fd = proc.stdout.fileno()
+    buf = bytearray()
+    pending = b""
+    tail = deque(maxlen=200)
+    num_lines = 0
+    log_enabled = log_output and logger.isEnabledFor(logging.INFO)
+    prefix = f"[{step_name}] "
+
+    while True:
+        chunk = os.read(fd, 65536)
+        if chunk:
+            buf += chunk
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+        else:
+            lines = [pending]
+        
+        for raw in lines:
+            line_stripped = raw.strip()
+            if not line_stripped:  # Só considera linhas não vazias
+                continue
+            tail.append(line_stripped)
+            num_lines += 1
+            if log_enabled and num_lines % log_every == 1:
+                logger.info('%s%s', prefix, line_stripped.decode('utf-8', 'replace'))
+        
+        if not chunk:
+            break
     
+    proc.stdout.close()
     proc.wait()
-    full_output = "".join(out_lines)
     
     if proc.returncode != 0:
+        for raw in tail:
+            logger.error('%s%s', prefix, raw.decode('utf-8', 'replace'))
         logger.error(f"=== FALHA: {step_name} (código {proc.returncode}) ===")
     else:
-        logger.info(f"=== SUCESSO: {step_name} ===")
+        logger.info(f"=== SUCESSO: {step_name} ({num_lines} linhas de saída) ===")
     
-    return proc.returncode, full_output
+    return proc.returncode, bytes(buf)
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    """json.loads via orjson quando instalado (erros continuam sendo json.JSONDecodeError)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Chaves que identificam um JSON como métricas de etapa
+_METRIC_KEYS = (
+    "total_arquivos_processados", "total_fundos", "detalhamento",
+    "status", "total_jsons", "total_registros_inseridos",
+    "detalhamento_por_fundo", "total_fundos_unicos", "total_arquivos",
+    "tamanho_total", "duracao_segundos"
+)
+
+# As métricas são sempre impressas no fim da saída
+_METRICS_TAIL_CHARS = 65536
+
+def _metrics_from_tail(output: str) -> Optional[Dict[str, Any]]:
+    """
+    Tenta a última linha iniciada por '{' até o último '}' do final da saída,
+    sem quebrar a saída inteira em linhas.
+    """
+    tail = output[-_METRICS_TAIL_CHARS:]
+    start = tail.rfind("\n{") + 1
+    end = tail.rfind("}")
+    if start >= end or tail[start] != "{":
+        return None
+    try:
+        parsed = _json_loads(tail[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    if isinstance(parsed, dict) and any(key in parsed for key in _METRIC_KEYS):
+        return parsed
+    return None
 
 def parse_metrics_from_output(output: str) -> Dict[str, Any]:
     """
@@ -159,35 +300,35 @@ def parse_metrics_from_output(output: str) -> Dict[str, Any]:
         return {}
     
     # Procura por linhas que começam com identificadores conhecidos
-    for ln in output.splitlines():
+    for ln in (output.splitlines() if "Métricas de" in output else ()):
         stripped = ln.strip()
         if (stripped.startswith("Métricas de Extração:") or 
             stripped.startswith("Métricas de Processamento:") or 
             stripped.startswith("Métricas de Inserção")):
             try:
                 json_part = stripped.split(":", 1)[1].strip()
-                parsed = json.loads(json_part)
+                parsed = _json_loads(json_part)
                 logger.debug(f"Métricas extraídas via identificador: {list(parsed.keys())}")
                 return parsed
             except (json.JSONDecodeError, IndexError) as e:
                 logger.warning(f"Erro ao parsear métrica com identificador: {e}")
                 continue
 
+    # Caminho rápido: JSON puro na última linha
+    parsed = _metrics_from_tail(output)
+    if parsed is not None:
+        logger.debug(f"Métricas encontradas via JSON: {list(parsed.keys())}")
+        return parsed
+
     # Procura por JSON puro nas últimas linhas (mais provável)
-    lines = output.strip().splitlines()
+    lines = output[-_METRICS_TAIL_CHARS:].strip().splitlines()
     for ln in reversed(lines[-10:]):  # Verifica últimas 10 linhas
         stripped = ln.strip()
         if stripped.startswith("{") and stripped.endswith("}"):
             try:
-                parsed = json.loads(stripped)
+                parsed = _json_loads(stripped)
                 # Verifica se tem estrutura de métricas conhecidas
-                expected_keys = [
-                    "total_arquivos_processados", "total_fundos", "detalhamento",
-                    "status", "total_jsons", "total_registros_inseridos",
-                    "detalhamento_por_fundo", "total_fundos_unicos", "total_arquivos",
-                    "tamanho_total", "duracao_segundos"
-                ]
-                if any(key in parsed for key in expected_keys):
+                if any(key in parsed for key in _METRIC_KEYS):
                     logger.debug(f"Métricas encontradas via JSON: {list(parsed.keys())}")
                     return parsed
             except json.JSONDecodeError:
@@ -197,67 +338,207 @@ def parse_metrics_from_output(output: str) -> Dict[str, Any]:
     logger.debug(f"Últimas 5 linhas da saída: {lines[-5:] if lines else 'N/A'}")
     return {}
 
-def build_processing_rows(raw_detalhamento: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Transforma detalhamento em formato compatível com template."""
-    rows: List[Dict[str, Any]] = []
-    for item in raw_detalhamento:
-        status_full = str(item.get("Status", "")).upper()
-        if "SUCESSO" in status_full or status_full == "OK":
-            status_text = "success"
-        elif "IGNORADO" in status_full or "SEM DADOS" in status_full:
-            status_text = "skipped"
-        else:
-            status_text = "failure"
+def _metrics_path(base: Path, data_ref: str, step: str) -> Path:
+    """
+    Caminho do arquivo de métricas (--metrics-out) de uma etapa.
+    Remove sobra de execução anterior para não ler métricas antigas.
+    """
+    path = base / "metrics" / f"{step}_{data_ref}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    return path
+
+def load_step_metrics(metrics_path: Path, output: bytes) -> Dict[str, Any]:
+    """
+    Lê as métricas gravadas pelo filho em metrics_path.
+    Se o arquivo não existir ou for inválido, cai no parsing da saída capturada,
+    que só nesse caso é decodificada.
+    """
+    try:
+        return _json_loads(metrics_path.read_bytes())
+    except FileNotFoundError:
+        logger.debug(f"Arquivo de métricas ausente ({metrics_path}), usando saída do processo")
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Erro ao ler métricas de {metrics_path}: {e}")
+    return parse_metrics_from_output(output.decode('utf-8', 'replace'))
+
+def _tally(dir_path: Path, exts: Tuple[str, ...]) -> Tuple[int, int]:
+    """
+    Conta arquivos com as extensões dadas e soma seus tamanhos numa única varredura.
+    Diretório inexistente conta como vazio.
+    """
+    num_files = total_bytes = 0
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if entry.name.endswith(exts) and entry.is_file():
+                    num_files += 1
+                    total_bytes += entry.stat().st_size
+    except FileNotFoundError:
+        pass
+    return num_files, total_bytes
+
+def _count_files(dir_path: Path, ext: str) -> int:
+    """Quantidade de arquivos com a extensão dada (sem stat por arquivo)."""
+    try:
+        with os.scandir(dir_path) as it:
+            return sum(1 for entry in it if entry.name.endswith(ext))
+    except FileNotFoundError:
+        return 0
+
+# Seções de métricas alimentadas por cada endpoint
+_ENDPOINT_SECTIONS = {
+    "carteira": ("extracao", "processamento"),
+    "rentabilidade": ("rentabilidade",),
+    "extrato": ("extrato",),
+}
+_SUM_FIELDS = ("num_arquivos", "tamanho_bytes", "duracao_segundos", "total_arquivos_processados",
+               "total_registros_inseridos", "total_fundos_unicos")
+_LIST_FIELDS = ("erros", "detalhamento", "detalhamento_por_fundo")
+
+@dataclass
+class StageMetrics:
+    """Métricas consolidadas de uma seção (extracao, processamento, rentabilidade ou extrato)."""
+    status: str = "SUCESSO"
+    num_arquivos: int = 0
+    tamanho_bytes: int = 0
+    duracao_segundos: float = 0.0
+    total_arquivos_processados: int = 0
+    total_registros_inseridos: int = 0
+    total_fundos_unicos: int = 0
+    erros: List[Any] = field(default_factory=list)
+    detalhamento: List[Dict[str, Any]] = field(default_factory=list)
+    detalhamento_por_fundo: List[Dict[str, Any]] = field(default_factory=list)
+    # Listas de cada data, concatenadas uma única vez em flatten()
+    _parts: Dict[str, List[List[Any]]] = field(default_factory=dict, repr=False)
+
+    def merge(self, section: Dict[str, Any]) -> None:
+        """Soma os contadores, guarda as listas e propaga FALHA das métricas de uma data."""
+        for key in _SUM_FIELDS:
+            value = section.get(key)
+            if value:
+                setattr(self, key, getattr(self, key) + value)
+        for key in _LIST_FIELDS:
+            value = section.get(key)
+            if value:
+                self._parts.setdefault(key, []).append(value)
+        if section.get("status") == "FALHA":
+            self.status = "FALHA"
+
+    def flatten(self) -> None:
+        """Concatena as listas acumuladas por merge() nos campos correspondentes."""
+        for key, parts in self._parts.items():
+            getattr(self, key).extend(chain.from_iterable(parts))
+        self._parts.clear()
+
+# Contexto do template zerado, usado como base dos emails de erro
+_EMPTY_CTX = MappingProxyType({
+    "status": "FALHA",
+    "duracao_total": "0 s",
+    "extracao_num_arquivos": 0,
+    "extracao_tamanho_total": "0 MB",
+    "extracao_duracao": "0 s",
+    "processamento_total_arquivos": 0,
+    "processamento_total_registros": 0,
+    "processamento_duracao": "0 s",
+    "processing_rows_carteira": (),
+    "rentabilidade_total_arquivos": 0,
+    "rentabilidade_total_registros": 0,
+    "rentabilidade_total_fundos": 0,
+    "rentabilidade_duracao": "0 s",
+    "processing_rows_rent": (),
+    "detalhamento_por_fundo_rent": (),
+    "extrato_total_arquivos": 0,
+    "extrato_total_registros": 0,
+    "extrato_duracao": "0 s",
+    "processing_rows_extrato": (),
+    "log_path": str(log_file_path),
+    "skipped_files_section": "",
+    "critical_funds_section": "",
+    "missing_funds_section": ""
+})
+
+_BYTES_PER_MB = 1048576
+
+def _mb(num_bytes: float) -> str:
+    """Tamanho formatado para o relatório (ex.: '1.25 MB')."""
+    return f"{num_bytes / _BYTES_PER_MB:.2f} MB"
+
+def _secs(seconds: float) -> str:
+    """Duração formatada para o relatório (ex.: '12.3 s')."""
+    return f"{seconds:.1f} s"
+
+def _error_email_context(date_range: str, total_dates: int, errors_section: str) -> Dict[str, Any]:
+    """Contexto do template de relatório para emails de erro (sem métricas)."""
+    now = datetime.datetime.now()
+    return {
+        **_EMPTY_CTX,
+        "data_referencia": now.strftime("%Y-%m-%d %H:%M"),
+        "date_range": date_range,
+        "total_dates_processed": total_dates,
+        "execution_id": now.isoformat(),
+        "errors_section": errors_section,
+    }
+
+def _carteira_ctx(metrics: Dict[str, StageMetrics]) -> Dict[str, Any]:
+    """Chaves do relatório final referentes à carteira (extração + processamento)."""
+    m_ext = metrics["extracao"]
+    m_proc = metrics["processamento"]
+    return {
+        "extracao_num_arquivos": m_ext.num_arquivos,
+        "extracao_tamanho_total": _mb(m_ext.tamanho_bytes),
+        "extracao_duracao": _secs(m_ext.duracao_segundos),
+        "processamento_total_arquivos": m_proc.total_arquivos_processados,
+        "processamento_total_registros": m_proc.total_registros_inseridos,
+        "processamento_duracao": _secs(m_proc.duracao_segundos),
+        "processing_rows_carteira": build_processing_rows(m_proc.detalhamento),
+    }
 
-        if status_text == "skipped":
-            total = inserted = duration = "-"
+def _rentabilidade_ctx(metrics: Dict[str, StageMetrics]) -> Dict[str, Any]:
+    """Chaves do relatório final referentes à rentabilidade."""
+    m_rent = metrics["rentabilidade"]
+    return {
+        "rentabilidade_total_arquivos": m_rent.total_arquivos_processados,
+        "rentabilidade_total_registros": m_rent.total_registros_inseridos,
+        "rentabilidade_total_fundos": m_rent.total_fundos_unicos,
+        "rentabilidade_duracao": _secs(m_rent.duracao_segundos),
+        "processing_rows_rent": m_rent.detalhamento,
+        "detalhamento_por_fundo_rent": m_rent.detalhamento_por_fundo,
+    }
+
+def _extrato_ctx(metrics: Dict[str, StageMetrics]) -> Dict[str, Any]:
+    """Chaves do relatório final referentes ao extrato."""
+    m_extrato = metrics["extrato"]
+    return {
+        "extrato_total_arquivos": m_extrato.total_arquivos_processados,
+        "extrato_total_registros": m_extrato.total_registros_inseridos,
+        "extrato_duracao": _secs(m_extrato.duracao_segundos),
+        "processing_rows_extrato": build_processing_rows(m_extrato.detalhamento),
+    }
+
+def _iter_error_items(metrics: Dict[str, StageMetrics], endpoints: List[str]):
+    """Gera os itens <li> da seção de erros do relatório, na ordem dos endpoints."""
+    for endpoint in endpoints:
+        if endpoint == "carteira":
+            for key in ("extracao", "processamento"):
+                for err in metrics[key].erros:
+                    yield f"<li>Carteira ({key.title()}): {err}</li>"
         else:
-            total = item.get("Total Linhas", 0)
-            inserted = item.get("Inseridos", 0)
-            duration = item.get("Duração (s)", 0)
-
-        rows.append({
-            "fundo": item.get("Arquivo", ""),
-            "date": item.get("Data Processo", ""),
-            "total": total,
-            "inserted": inserted,
-            "duration": duration,
-            "status_text": status_text
-        })
-    return rows
+            for err in metrics[endpoint].erros:
+                yield f"<li>{endpoint.title()}: {err}</li>"
+
+# Endpoint -> construtor das suas chaves no template; os demais ficam zerados (_EMPTY_CTX)
+_ENDPOINT_CTX = {
+    "carteira": _carteira_ctx,
+    "rentabilidade": _rentabilidade_ctx,
+    "extrato": _extrato_ctx,
+}
 
 def send_error_email(data_ref: str, error_message: str, step: str):
     """Envia email de erro específico."""
-    tmpl = {
-        "status": "FALHA",
-        "data_referencia": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
-        "date_range": data_ref,
-        "total_dates_processed": 1,
-        "duracao_total": "0 s",
-        "extracao_num_arquivos": 0,
-        "extracao_tamanho_total": "0 MB",
-        "extracao_duracao": "0 s",
-        "processamento_total_arquivos": 0,
-        "processamento_total_registros": 0,
-        "processamento_duracao": "0 s",
-        "processing_rows_carteira": [],
-        "rentabilidade_total_arquivos": 0,
-        "rentabilidade_total_registros": 0,
-        "rentabilidade_total_fundos": 0,
-        "rentabilidade_duracao": "0 s",
-        "processing_rows_rent": [],
-        "detalhamento_por_fundo_rent": [],
-        "extrato_total_arquivos": 0,
-        "extrato_total_registros": 0,
-        "extrato_duracao": "0 s",
-        "processing_rows_extrato": [],
-        "execution_id": datetime.datetime.now().isoformat(),
-        "log_path": str(log_file_path),
-        "errors_section": f"<p><strong>Erro em {step}:</strong> {error_message}</p>",
-        "skipped_files_section": "",
-        "critical_funds_section": "",
-        "missing_funds_section": ""
-    }
+    tmpl = _error_email_context(
+        data_ref, 1, f"<p><strong>Erro em {step}:</strong> {error_message}</p>"
+    )
     
     try:
         notification_manager.send_with_template(
@@ -274,6 +555,255 @@ def send_error_email(data_ref: str, error_message: str, step: str):
     except Exception as e:
         logger.error(f"Falha ao enviar email de erro: {e}")
 
+def send_batch_error_email(failed_dates: List[Tuple[str, str, str]]):
+    """
+    Envia um único email com todas as falhas da execução, agrupadas por etapa.
+    failed_dates: lista de (data_ref, mensagem, etapa). Com uma só falha usa send_error_email.
+    """
+    if not failed_dates:
+        return
+    if len(failed_dates) == 1:
+        data_ref, error_message, step = failed_dates[0]
+        send_error_email(data_ref, error_message, f"{step} {data_ref}")
+        return
+
+    por_etapa: Dict[str, List[Tuple[str, str]]] = {}
+    for data_ref, error_message, step in sorted(failed_dates):
+        por_etapa.setdefault(step, []).append((data_ref, error_message))
+
+    errors_section = "".join(
+        f"<p><strong>Erros em {step} ({len(itens)} datas):</strong></p>"
+        + "<ul>" + "".join(f"<li>{data_ref}: {msg}</li>" for data_ref, msg in itens) + "</ul>"
+        for step, itens in por_etapa.items()
+    )
+    datas = sorted({data_ref for data_ref, _, _ in failed_dates})
+    date_range = f"{datas[0]} a {datas[-1]}" if len(datas) > 1 else datas[0]
+    tmpl = _error_email_context(date_range, len(datas), errors_section)
+
+    try:
+        notification_manager.send_with_template(
+            TemplateNotification(
+                type=NotificationType.EMAIL,
+                recipients=RECEIVER_EMAIL,
+                subject=f"🚨 ERRO ETL BTG - {len(failed_dates)} falhas ({date_range})",
+                template_path=str(EMAIL_TEMPLATES_DIR / "btg_carteira_report.html"),
+                context=tmpl,
+                kwargs={"is_html": True}
+            )
+        )
+        logger.info(f"Email consolidado de erros enviado ({len(failed_dates)} falhas)")
+    except Exception as e:
+        logger.error(f"Falha ao enviar email consolidado de erros: {e}")
+
+def _run_carteira(data_ref: str, base: Path, args, date_metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Extração + inserção de carteira. Atualiza apenas as seções 'extracao' e 'processamento'."""
+    extracted_data_dir = base / "extracted" / data_ref
+
+    logger.info(f"=== INICIANDO EXTRAÇÃO DE CARTEIRA - {data_ref} ===")
+    start_ext = time.perf_counter()
+    metrics_ext_path = _metrics_path(base, data_ref, "extracao_carteira")
+    cmd_ext = [
+        sys.executable,
+        str(_SCRIPTS["api_faas_portfolio"]),
+        "--date", data_ref,
+        "--output-dir-base", str(base),
+        "--metrics-out", str(metrics_ext_path)
+    ]
+    code_ext, out_ext = run_command(cmd_ext, f"Extracao_Carteira_{data_ref}")
+    end_ext = time.perf_counter()
+    
+    metrics_ext = load_step_metrics(metrics_ext_path, out_ext)
+    
+    # Calcula métricas reais da extração (pastas da própria data: as demais datas rodam em paralelo)
+    raw_dir = base / "raw" / data_ref
+    extracted_dir = base / "extracted" / data_ref
+    
+    raw_files, raw_bytes = _tally(raw_dir, (".zip", ".xlsx"))
+    ext_files, ext_bytes = _tally(extracted_dir, (".xlsx",))
+    
+    num_files = raw_files + ext_files
+    total_bytes = raw_bytes + ext_bytes
+    dur_ext = end_ext - start_ext
+
+    date_metrics["extracao"].update({
+        "status": "SUCESSO" if code_ext == 0 else "FALHA",
+        "num_arquivos": num_files,
+        "tamanho_bytes": total_bytes,
+        "duracao_segundos": dur_ext,
+        "erros": metrics_ext.get("erros", []) if code_ext != 0 else []
+    })
+
+    if code_ext != 0:
+        logger.error(f"Falha na extração de carteira para {data_ref}")
+        return {"extracao": date_metrics["extracao"], "processamento": date_metrics["processamento"]}
+
+    # ETAPA 2: INSERÇÃO no Banco de Dados (Carteira)
+    if ext_files == 0:
+        # Sem planilhas extraídas para a data: não sobe um interpretador só para inserir 0 linhas
+        logger.info(f"Nenhum arquivo extraído em {extracted_dir}; inserção de carteira ignorada")
+        date_metrics["processamento"]["status"] = "IGNORADO"
+    elif not args.skip_insertion:
+        logger.info(f"=== INICIANDO PROCESSAMENTO DE CARTEIRA - {data_ref} ===")
+        insert_script_path = _SCRIPTS["insert_carteira"]
+        if "insert_carteira" not in _MISSING_SCRIPTS:
+            start_ins = time.perf_counter()
+            metrics_ins_path = _metrics_path(base, data_ref, "insercao_carteira")
+            insert_cmd = [
+                sys.executable,
+                str(insert_script_path),
+                "--date", data_ref,
+                "--input-dir", str(extracted_data_dir),
+                "--metrics-out", str(metrics_ins_path)
+            ]
+            code_ins, out_ins = run_command(insert_cmd, f"Insercao_Carteira_{data_ref}")
+            end_ins = time.perf_counter()
+            
+            metrics_ins = load_step_metrics(metrics_ins_path, out_ins)
+            dur_ins = end_ins - start_ins
+            
+            date_metrics["processamento"].update({
+                "status": "SUCESSO" if code_ins == 0 else "FALHA",
+                "total_arquivos_processados": metrics_ins.get("total_arquivos_processados", 0),
+                "total_registros_inseridos": metrics_ins.get("total_registros_inseridos", 0),
+                "duracao_segundos": dur_ins,
+                "erros": metrics_ins.get("erros", []),
+                "detalhamento": metrics_ins.get("detalhamento", [])
+            })
+        else:
+            logger.warning(f"Script de inserção não encontrado: {insert_script_path}")
+    else:
+        logger.info("Inserção de carteira pulada (--skip-insertion)")
+
+    return {"extracao": date_metrics["extracao"], "processamento": date_metrics["processamento"]}
+
+def _run_rentabilidade(data_ref: str, base: Path, args, date_metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Extração + inserção de rentabilidade. Atualiza apenas a seção 'rentabilidade'."""
+    logger.info(f"=== INICIANDO PROCESSAMENTO DE RENTABILIDADE - {data_ref} ===")
+    
+    # Extração de Rentabilidade
+    start_rent_ext = time.perf_counter()
+    rent_ext_script = _SCRIPTS["api_faas_rent"]
+    metrics_rent_ext_path = _metrics_path(base, data_ref, "extracao_rentabilidade")
+    rent_ext_cmd = [
+        sys.executable,
+        str(rent_ext_script),
+        "--json-dir", str(base / "raw_rent" / data_ref),
+        "--date", data_ref,
+        "--metrics-out", str(metrics_rent_ext_path)
+    ]
+    code_rent_ext, out_rent_ext = run_command(rent_ext_cmd, f"Extracao_Rentabilidade_{data_ref}")
+    end_rent_ext = time.perf_counter()
+    
+    metrics_rent_ext = load_step_metrics(metrics_rent_ext_path, out_rent_ext)
+    dur_rent_ext = end_rent_ext - start_rent_ext
+
+    pasta_jsons_rent = base / "raw_rent" / data_ref
+    total_arquivos_rent = _count_files(pasta_jsons_rent, ".json")
+
+    date_metrics["rentabilidade"].update({
+        "status": "SUCESSO" if code_rent_ext == 0 else "FALHA",
+        "total_arquivos_processados": total_arquivos_rent,
+        "duracao_segundos": dur_rent_ext,
+        "erros": metrics_rent_ext.get("erros", [])
+    })
+
+    # Inserção Rentabilidade
+    if code_rent_ext == 0 and not args.skip_insertion and total_arquivos_rent > 0:
+        rent_insert_script = _SCRIPTS["insert_rent"]
+        if "insert_rent" not in _MISSING_SCRIPTS:
+            start_rent_ins = time.perf_counter()
+            metrics_rent_ins_path = _metrics_path(base, data_ref, "insercao_rentabilidade")
+            rent_ins_cmd = [
+                sys.executable,
+                str(rent_insert_script),
+                "--json-dir", str(pasta_jsons_rent),
+                "--auto",
+                "--metrics-out", str(metrics_rent_ins_path)
+            ]
+            code_rent_ins, out_rent_ins = run_command(rent_ins_cmd, f"Insercao_Rentabilidade_{data_ref}")
+            end_rent_ins = time.perf_counter()
+            
+            metrics_rent_ins = load_step_metrics(metrics_rent_ins_path, out_rent_ins)
+            dur_rent_ins = end_rent_ins - start_rent_ins
+            
+            date_metrics["rentabilidade"].update({
+                "status": "SUCESSO" if code_rent_ins == 0 else "FALHA",
+                "total_registros_inseridos": metrics_rent_ins.get("total_registros_inseridos", 0),
+                "total_fundos_unicos": metrics_rent_ins.get("total_fundos_unicos", 0),
+                "duracao_segundos": dur_rent_ins,
+                "detalhamento": metrics_rent_ins.get("detalhamento", []),
+                "detalhamento_por_fundo": metrics_rent_ins.get("detalhamento_por_fundo", [])
+            })
+        else:
+            logger.warning(f"Script de inserção rentabilidade não encontrado: {rent_insert_script}")
+    elif args.skip_insertion:
+        logger.info("Inserção de rentabilidade pulada (--skip-insertion)")
+
+    return {"rentabilidade": date_metrics["rentabilidade"]}
+
+def _run_extrato(data_ref: str, base: Path, args, date_metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Extração + inserção de extrato. Atualiza apenas a seção 'extrato'."""
+    logger.info(f"=== INICIANDO PROCESSAMENTO DE EXTRATO - {data_ref} ===")
+    
+    # Extração de Extrato
+    start_extrato_ext = time.perf_counter()
+    extrato_ext_script = _SCRIPTS["api_faas_extrato"]
+    metrics_extrato_ext_path = _metrics_path(base, data_ref, "extracao_extrato")
+    extrato_ext_cmd = [
+        sys.executable,
+        str(extrato_ext_script),
+        "--date", data_ref,
+        "--output-dir-base", str(base),
+        "--metrics-out", str(metrics_extrato_ext_path)
+    ]
+    code_extrato_ext, out_extrato_ext = run_command(extrato_ext_cmd, f"Extracao_Extrato_{data_ref}")
+    end_extrato_ext = time.perf_counter()
+    
+    metrics_extrato_ext = load_step_metrics(metrics_extrato_ext_path, out_extrato_ext)
+    dur_extrato_ext = end_extrato_ext - start_extrato_ext
+
+    pasta_jsons_extrato = base / "extrato" / data_ref
+    total_arquivos_extrato = _count_files(pasta_jsons_extrato, ".json")
+
+    date_metrics["extrato"].update({
+        "status": "SUCESSO" if code_extrato_ext == 0 else "FALHA",
+        "total_arquivos_processados": total_arquivos_extrato,
+        "duracao_segundos": dur_extrato_ext,
+        "erros": metrics_extrato_ext.get("erros", [])
+    })
+
+    # Inserção Extrato
+    if code_extrato_ext == 0 and not args.skip_insertion and total_arquivos_extrato > 0:
+        extrato_insert_script = _SCRIPTS["insert_extrato"]
+        if "insert_extrato" not in _MISSING_SCRIPTS:
+            start_extrato_ins = time.perf_counter()
+            metrics_extrato_ins_path = _metrics_path(base, data_ref, "insercao_extrato")
+            extrato_ins_cmd = [
+                sys.executable,
+                str(extrato_insert_script),
+                "--json-dir", str(pasta_jsons_extrato),
+                "--auto",
+                "--metrics-out", str(metrics_extrato_ins_path)
+            ]
+            code_extrato_ins, out_extrato_ins = run_command(extrato_ins_cmd, f"Insercao_Extrato_{data_ref}")
+            end_extrato_ins = time.perf_counter()
+            
+            metrics_extrato_ins = load_step_metrics(metrics_extrato_ins_path, out_extrato_ins)
+            dur_extrato_ins = end_extrato_ins - start_extrato_ins
+            
+            date_metrics["extrato"].update({
+                "status": "SUCESSO" if code_extrato_ins == 0 else "FALHA",
+                "total_registros_inseridos": metrics_extrato_ins.get("total_registros_inseridos", 0),
+                "duracao_segundos": dur_extrato_ins,
+                "detalhamento": metrics_extrato_ins.get("detalhamento", [])
+            })
+        else:
+            logger.warning(f"Script de inserção extrato não encontrado: {extrato_insert_script}")
+    elif args.skip_insertion:
+        logger.info("Inserção de extrato pulada (--skip-insertion)")
+
+    return {"extrato": date_metrics["extrato"]}
+
 def process_single_date(data_ref: str, base: Path, args) -> Dict[str, Any]:
     """
     Processa uma única data para os endpoints selecionados.
@@ -283,8 +813,6 @@ def process_single_date(data_ref: str, base: Path, args) -> Dict[str, Any]:
     logger.info(f"Endpoints selecionados: {args.endpoints}")
     logger.info(f"Skip insertion: {args.skip_insertion}")
     
-    extracted_data_dir = base / "extracted" / data_ref
-    
     # Estrutura de métricas para esta data
     date_metrics = {
         "data": data_ref,
@@ -310,195 +838,22 @@ def process_single_date(data_ref: str, base: Path, args) -> Dict[str, Any]:
         }
     }
 
-    # ETAPA 1: EXTRAÇÃO de Carteira Diária
-    if 'carteira' in args.endpoints:
-        logger.info(f"=== INICIANDO EXTRAÇÃO DE CARTEIRA - {data_ref} ===")
-        start_ext = datetime.datetime.now()
-        cmd_ext = [
-            sys.executable,
-            str(Path(__file__).parent / "api_faas_portfolio.py"),
-            "--date", data_ref,
-            "--output-dir-base", str(base)
-        ]
-        code_ext, out_ext = run_command(cmd_ext, f"Extracao_Carteira_{data_ref}")
-        end_ext = datetime.datetime.now()
-        
-        metrics_ext = parse_metrics_from_output(out_ext)
-        
-        # Calcula métricas reais da extração
-        raw_dir = base / "raw"
-        extracted_dir = base / "extracted" / data_ref
-        
-        arquivos_extraidos = []
-        if raw_dir.exists():
-            arquivos_extraidos = list(raw_dir.glob("*.zip")) + list(raw_dir.glob("*.xlsx"))
-        if extracted_dir.exists():
-            arquivos_extraidos.extend(list(extracted_dir.glob("*.xlsx")))
-        
-        num_files = len(arquivos_extraidos)
-        total_bytes = sum(f.stat().st_size for f in arquivos_extraidos if f.exists())
-        dur_ext = (end_ext - start_ext).total_seconds()
-
-        date_metrics["extracao"].update({
-            "status": "SUCESSO" if code_ext == 0 else "FALHA",
-            "num_arquivos": num_files,
-            "tamanho_bytes": total_bytes,
-            "duracao_segundos": dur_ext,
-            "erros": metrics_ext.get("erros", []) if code_ext != 0 else []
-        })
-
-        if code_ext != 0:
-            logger.error(f"Falha na extração de carteira para {data_ref}")
-            return date_metrics
-
-        # ETAPA 2: INSERÇÃO no Banco de Dados (Carteira)
-        if not args.skip_insertion:
-            logger.info(f"=== INICIANDO PROCESSAMENTO DE CARTEIRA - {data_ref} ===")
-            insert_script_path = ROOT_PATH / "backend" / "api_btg" / "insert_db" / "insert_carteira.py"
-            if insert_script_path.exists():
-                start_ins = datetime.datetime.now()
-                insert_cmd = [
-                    sys.executable,
-                    str(insert_script_path),
-                    "--date", data_ref,
-                    "--input-dir", str(extracted_data_dir)
-                ]
-                code_ins, out_ins = run_command(insert_cmd, f"Insercao_Carteira_{data_ref}")
-                end_ins = datetime.datetime.now()
-                
-                metrics_ins = parse_metrics_from_output(out_ins)
-                dur_ins = (end_ins - start_ins).total_seconds()
-                
-                date_metrics["processamento"].update({
-                    "status": "SUCESSO" if code_ins == 0 else "FALHA",
-                    "total_arquivos_processados": metrics_ins.get("total_arquivos_processados", 0),
-                    "total_registros_inseridos": metrics_ins.get("total_registros_inseridos", 0),
-                    "duracao_segundos": dur_ins,
-                    "erros": metrics_ins.get("erros", []),
-                    "detalhamento": metrics_ins.get("detalhamento", [])
-                })
-            else:
-                logger.warning(f"Script de inserção não encontrado: {insert_script_path}")
-        else:
-            logger.info("Inserção de carteira pulada (--skip-insertion)")
+    # Endpoints independentes rodam em paralelo; cada helper serializa
+    # sua própria inserção após a extração correspondente.
+    endpoints = frozenset(args.endpoints)
+    stages = []
+    if 'carteira' in endpoints:
+        stages.append(_run_carteira)
+    if 'rentabilidade' in endpoints:
+        stages.append(_run_rentabilidade)
+    if 'extrato' in endpoints:
+        stages.append(_run_extrato)
 
-    # ETAPA 3: EXTRAÇÃO + INSERÇÃO de Rentabilidade
-    if 'rentabilidade' in args.endpoints:
-        logger.info(f"=== INICIANDO PROCESSAMENTO DE RENTABILIDADE - {data_ref} ===")
-        
-        # Extração de Rentabilidade
-        start_rent_ext = datetime.datetime.now()
-        rent_ext_script = ROOT_PATH / "backend" / "api_btg" / "api_faas_rentabilidade.py"
-        rent_ext_cmd = [
-            sys.executable,
-            str(rent_ext_script),
-            "--json-dir", str(base / "raw_rent" / data_ref),
-            "--date", data_ref
-        ]
-        code_rent_ext, out_rent_ext = run_command(rent_ext_cmd, f"Extracao_Rentabilidade_{data_ref}")
-        end_rent_ext = datetime.datetime.now()
-        
-        metrics_rent_ext = parse_metrics_from_output(out_rent_ext)
-        dur_rent_ext = (end_rent_ext - start_rent_ext).total_seconds()
-
-        pasta_jsons_rent = base / "raw_rent" / data_ref
-        arquivos_json = list(pasta_jsons_rent.glob("*.json")) if pasta_jsons_rent.exists() else []
-        total_arquivos_rent = len(arquivos_json)
-
-        date_metrics["rentabilidade"].update({
-            "status": "SUCESSO" if code_rent_ext == 0 else "FALHA",
-            "total_arquivos_processados": total_arquivos_rent,
-            "duracao_segundos": dur_rent_ext,
-            "erros": metrics_rent_ext.get("erros", [])
-        })
-
-        # Inserção Rentabilidade
-        if code_rent_ext == 0 and not args.skip_insertion and total_arquivos_rent > 0:
-            rent_insert_script = ROOT_PATH / "backend" / "api_btg" / "insert_db" / "insert_rentabilidade.py"
-            if rent_insert_script.exists():
-                start_rent_ins = datetime.datetime.now()
-                rent_ins_cmd = [
-                    sys.executable,
-                    str(rent_insert_script),
-                    "--json-dir", str(pasta_jsons_rent),
-                    "--auto"
-                ]
-                code_rent_ins, out_rent_ins = run_command(rent_ins_cmd, f"Insercao_Rentabilidade_{data_ref}")
-                end_rent_ins = datetime.datetime.now()
-                
-                metrics_rent_ins = parse_metrics_from_output(out_rent_ins)
-                dur_rent_ins = (end_rent_ins - start_rent_ins).total_seconds()
-                
-                date_metrics["rentabilidade"].update({
-                    "status": "SUCESSO" if code_rent_ins == 0 else "FALHA",
-                    "total_registros_inseridos": metrics_rent_ins.get("total_registros_inseridos", 0),
-                    "total_fundos_unicos": metrics_rent_ins.get("total_fundos_unicos", 0),
-                    "duracao_segundos": dur_rent_ins,
-                    "detalhamento": metrics_rent_ins.get("detalhamento", []),
-                    "detalhamento_por_fundo": metrics_rent_ins.get("detalhamento_por_fundo", [])
-                })
-            else:
-                logger.warning(f"Script de inserção rentabilidade não encontrado: {rent_insert_script}")
-        elif args.skip_insertion:
-            logger.info("Inserção de rentabilidade pulada (--skip-insertion)")
-
-    # ETAPA 4: EXTRAÇÃO + INSERÇÃO de Extrato
-    if 'extrato' in args.endpoints:
-        logger.info(f"=== INICIANDO PROCESSAMENTO DE EXTRATO - {data_ref} ===")
-        
-        # Extração de Extrato
-        start_extrato_ext = datetime.datetime.now()
-        extrato_ext_script = ROOT_PATH / "backend" / "api_btg" / "api_faas_extrato.py"
-        extrato_ext_cmd = [
-            sys.executable,
-            str(extrato_ext_script),
-            "--date", data_ref,
-            "--output-dir-base", str(base)
-        ]
-        code_extrato_ext, out_extrato_ext = run_command(extrato_ext_cmd, f"Extracao_Extrato_{data_ref}")
-        end_extrato_ext = datetime.datetime.now()
-        
-        metrics_extrato_ext = parse_metrics_from_output(out_extrato_ext)
-        dur_extrato_ext = (end_extrato_ext - start_extrato_ext).total_seconds()
-
-        pasta_jsons_extrato = base / "extrato" / data_ref
-        arquivos_json_extrato = list(pasta_jsons_extrato.glob("*.json")) if pasta_jsons_extrato.exists() else []
-        total_arquivos_extrato = len(arquivos_json_extrato)
-
-        date_metrics["extrato"].update({
-            "status": "SUCESSO" if code_extrato_ext == 0 else "FALHA",
-            "total_arquivos_processados": total_arquivos_extrato,
-            "duracao_segundos": dur_extrato_ext,
-            "erros": metrics_extrato_ext.get("erros", [])
-        })
-
-        # Inserção Extrato
-        if code_extrato_ext == 0 and not args.skip_insertion and total_arquivos_extrato > 0:
-            extrato_insert_script = ROOT_PATH / "backend" / "api_btg" / "insert_db" / "insert_extrato.py"
-            if extrato_insert_script.exists():
-                start_extrato_ins = datetime.datetime.now()
-                extrato_ins_cmd = [
-                    sys.executable,
-                    str(extrato_insert_script),
-                    "--json-dir", str(pasta_jsons_extrato),
-                    "--auto"
-                ]
-                code_extrato_ins, out_extrato_ins = run_command(extrato_ins_cmd, f"Insercao_Extrato_{data_ref}")
-                end_extrato_ins = datetime.datetime.now()
-                
-                metrics_extrato_ins = parse_metrics_from_output(out_extrato_ins)
-                dur_extrato_ins = (end_extrato_ins - start_extrato_ins).total_seconds()
-                
-                date_metrics["extrato"].update({
-                    "status": "SUCESSO" if code_extrato_ins == 0 else "FALHA",
-                    "total_registros_inseridos": metrics_extrato_ins.get("total_registros_inseridos", 0),
-                    "duracao_segundos": dur_extrato_ins,
-                    "detalhamento": metrics_extrato_ins.get("detalhamento", [])
-                })
-            else:
-                logger.warning(f"Script de inserção extrato não encontrado: {extrato_insert_script}")
-        elif args.skip_insertion:
-            logger.info("Inserção de extrato pulada (--skip-insertion)")
+    if stages:
+        with ThreadPoolExecutor(max_workers=len(stages)) as executor:
+            futures = [executor.submit(stage, data_ref, base, args, date_metrics) for stage in stages]
+            for future in as_completed(futures):
+                date_metrics.update(future.result())
 
     logger.info(f"=== PROCESSAMENTO CONCLUÍDO PARA {data_ref} ===")
     return date_metrics
@@ -518,18 +873,28 @@ def main():
     parser.add_argument('--endpoints', nargs='+', choices=['carteira', 'rentabilidade', 'extrato'], 
                        default=['carteira', 'rentabilidade', 'extrato'],
                        help='Endpoints a serem processados')
+    parser.add_argument('--max-workers', type=int, default=None,
+                       help='Número máximo de datas processadas em paralelo (padrão: min(datas, CPUs))')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Não envia emails (relatório final e alertas de erro)')
     args = parser.parse_args()
+    endpoints = frozenset(args.endpoints)
 
     logger.info("=== ORQUESTRADOR BTG INICIADO ===")
     logger.info(f"Argumentos: {vars(args)}")
     logger.info(f"Arquivo de log: {log_file_path}")
+    for name in sorted(_MISSING_SCRIPTS):
+        logger.warning(f"Script não encontrado ({name}): {_SCRIPTS[name]}")
 
     # Determina as datas a serem processadas
     try:
         if args.date_range:
             start_date, end_date = args.date_range.split(':')
-            datetime.datetime.strptime(start_date, '%Y-%m-%d')
-            datetime.datetime.strptime(end_date, '%Y-%m-%d')
+            start_dt = datetime.datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_dt = datetime.datetime.strptime(end_date, '%Y-%m-%d').date()
+            # Calendário consultado uma única vez, com 1 ano de folga em torno do período
+            if np is not None:
+                _load_business_days(start_dt, end_dt)
             dates_to_process = generate_business_days_range(start_date, end_date)
             logger.info(f"Processamento em lote: {len(dates_to_process)} dias úteis entre {start_date} e {end_date}")
             
@@ -554,7 +919,8 @@ def main():
     except Exception as e:
         error_msg = f"Erro ao determinar datas: {e}"
         logger.error(error_msg)
-        send_error_email("N/A", error_msg, "Validação de Data")
+        if not args.dry_run:
+            send_error_email("N/A", error_msg, "Validação de Data")
         sys.exit(1)
 
     base = Path(args.output_dir_base)
@@ -562,149 +928,93 @@ def main():
     
     # Métricas consolidadas de todas as datas
     all_dates_metrics = []
-    consolidated_metrics = {
-        "extracao": {"status": "SUCESSO", "num_arquivos": 0, "tamanho_bytes": 0, "duracao_segundos": 0, "erros": []},
-        "processamento": {"status": "SUCESSO", "total_arquivos_processados": 0, "total_registros_inseridos": 0, 
-                         "duracao_segundos": 0, "erros": [], "detalhamento": []},
-        "rentabilidade": {"status": "SUCESSO", "total_arquivos_processados": 0, "total_registros_inseridos": 0, 
-                         "total_fundos_unicos": 0, "duracao_segundos": 0, "erros": [], 
-                         "detalhamento": [], "detalhamento_por_fundo": []},
-        "extrato": {"status": "SUCESSO", "total_arquivos_processados": 0, "total_registros_inseridos": 0, 
-                   "duracao_segundos": 0, "erros": [], "detalhamento": []}
+    consolidated_metrics: Dict[str, StageMetrics] = {
+        section: StageMetrics() for sections in _ENDPOINT_SECTIONS.values() for section in sections
     }
+    selected_sections = [section for ep in args.endpoints for section in _ENDPOINT_SECTIONS[ep]]
+
+    # Falhas por data: (data_ref, mensagem, etapa), enviadas em um único email ao final
+    failed_dates: List[Tuple[str, str, str]] = []
 
     # Tempo de início global
-    start_global = datetime.datetime.now()
+    start_global = time.perf_counter()
 
-    # Processa cada data
-    for i, data_ref in enumerate(dates_to_process, 1):
-        try:
-            logger.info(f"=== PROCESSANDO DATA {i}/{len(dates_to_process)}: {data_ref} ===")
-            date_metrics = process_single_date(data_ref, base, args)
-            all_dates_metrics.append(date_metrics)
-            
-            # Consolida métricas apenas dos endpoints processados
-            for endpoint in args.endpoints:
-                if endpoint == "carteira":
-                    # Carteira usa "extracao" e "processamento"
-                    for key in ["extracao", "processamento"]:
-                        if key in date_metrics:
-                            date_endpoint_metrics = date_metrics[key]
-                            for metric_key in ["num_arquivos", "tamanho_bytes", "duracao_segundos", 
-                                             "total_arquivos_processados", "total_registros_inseridos"]:
-                                if metric_key in date_endpoint_metrics and date_endpoint_metrics[metric_key]:
-                                    consolidated_metrics[key][metric_key] = consolidated_metrics[key].get(metric_key, 0) + date_endpoint_metrics[metric_key]
-                            
-                            for list_key in ["erros", "detalhamento"]:
-                                if list_key in date_endpoint_metrics and date_endpoint_metrics[list_key]:
-                                    consolidated_metrics[key][list_key].extend(date_endpoint_metrics[list_key])
-                            
-                            if date_endpoint_metrics["status"] == "FALHA":
-                                consolidated_metrics[key]["status"] = "FALHA"
-                
-                elif endpoint in ["rentabilidade", "extrato"]:
-                    if endpoint in date_metrics:
-                        date_endpoint_metrics = date_metrics[endpoint]
-                        for metric_key in ["total_arquivos_processados", "total_registros_inseridos", 
-                                         "total_fundos_unicos", "duracao_segundos"]:
-                            if metric_key in date_endpoint_metrics and date_endpoint_metrics[metric_key]:
-                                consolidated_metrics[endpoint][metric_key] = consolidated_metrics[endpoint].get(metric_key, 0) + date_endpoint_metrics[metric_key]
-                        
-                        for list_key in ["erros", "detalhamento", "detalhamento_por_fundo"]:
-                            if list_key in date_endpoint_metrics and date_endpoint_metrics[list_key]:
-                                consolidated_metrics[endpoint][list_key].extend(date_endpoint_metrics[list_key])
-                        
-                        if date_endpoint_metrics["status"] == "FALHA":
-                            consolidated_metrics[endpoint]["status"] = "FALHA"
-                    
-        except Exception as e:
-            error_msg = f"Erro ao processar data {data_ref}: {e}"
-            logger.error(error_msg)
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            send_error_email(data_ref, error_msg, f"Processamento {data_ref}")
+    # Processa as datas em paralelo; a consolidação fica na thread principal
+    max_workers = args.max_workers or max(1, min(len(dates_to_process), os.cpu_count() or 1))
+    logger.info(f"Processando {len(dates_to_process)} datas com até {max_workers} workers")
+
+    # Resultado de cada data: métricas ou mensagem de erro
+    date_results: Dict[str, Dict[str, Any]] = {}
+    date_errors: Dict[str, str] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(process_single_date, data_ref, base, args): data_ref
+            for data_ref in dates_to_process
+        }
+        # as_completed apenas para o log de progresso
+        for i, future in enumerate(as_completed(futures), 1):
+            data_ref = futures[future]
+            try:
+                date_results[data_ref] = future.result()
+                logger.info(f"=== DATA CONCLUÍDA {i}/{len(dates_to_process)}: {data_ref} ===")
+            except Exception as e:
+                error_msg = f"Erro ao processar data {data_ref}: {e}"
+                logger.error(error_msg)
+                logger.error(f"Traceback: {traceback.format_exc()}")
+                date_errors[data_ref] = error_msg
+
+    # Consolida em ordem cronológica (independe da ordem de conclusão das threads)
+    for data_ref in dates_to_process:
+        if data_ref in date_errors:
+            failed_dates.append((data_ref, date_errors[data_ref], "Processamento"))
+            continue
+        date_metrics = date_results[data_ref]
+        all_dates_metrics.append(date_metrics)
 
-    end_global = datetime.datetime.now()
-    duracao_global = (end_global - start_global).total_seconds()
+        # Consolida métricas apenas dos endpoints processados
+        for section in selected_sections:
+            if section in date_metrics:
+                consolidated_metrics[section].merge(date_metrics[section])
+
+    end_global = time.perf_counter()
+    for stage_metrics in consolidated_metrics.values():
+        stage_metrics.flatten()
+    duracao_global = end_global - start_global
+
+    if failed_dates and not args.dry_run:
+        send_batch_error_email(failed_dates)
 
     # ENVIO DO E-MAIL FINAL
     logger.info("=== PREPARANDO RELATÓRIO FINAL ===")
     
     # Determinar status geral baseado nos endpoints processados
-    status_geral = "SUCESSO"
-    for endpoint in args.endpoints:
-        if endpoint == "carteira":
-            if (consolidated_metrics["extracao"]["status"] == "FALHA" or 
-                consolidated_metrics["processamento"]["status"] == "FALHA"):
-                status_geral = "FALHA"
-                break
-        elif endpoint in ["rentabilidade", "extrato"]:
-            if consolidated_metrics[endpoint]["status"] == "FALHA":
-                status_geral = "FALHA"
-                break
-
-    # Preparar dados para o template
-    processing_rows_carteira = build_processing_rows(consolidated_metrics["processamento"]["detalhamento"])
-    processing_rows_rent = consolidated_metrics["rentabilidade"]["detalhamento"]
-    processing_rows_extrato = build_processing_rows(consolidated_metrics["extrato"]["detalhamento"])
-    detalhamento_por_fundo_rent = consolidated_metrics["rentabilidade"]["detalhamento_por_fundo"]
+    status_geral = "FALHA" if any(
+        consolidated_metrics[section].status == "FALHA" for section in selected_sections
+    ) else "SUCESSO"
 
     date_range_display = f"{dates_to_process[0]} a {dates_to_process[-1]}" if len(dates_to_process) > 1 else dates_to_process[0]
     
+    # Endpoints não selecionados ficam com os valores zerados de _EMPTY_CTX
+    report_time = datetime.datetime.now()
     final_ctx = {
+        **_EMPTY_CTX,
         "status": status_geral,
-        "data_referencia": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "data_referencia": report_time.strftime("%Y-%m-%d %H:%M"),
         "date_range": date_range_display,
         "total_dates_processed": len(dates_to_process),
         "endpoints_processados": ", ".join(args.endpoints).upper(),
-        "duracao_total": f"{duracao_global:.1f} s",
-
-        # Carteira
-        "extracao_num_arquivos": consolidated_metrics["extracao"]["num_arquivos"] if "carteira" in args.endpoints else 0,
-        "extracao_tamanho_total": f"{consolidated_metrics['extracao']['tamanho_bytes']/1024**2:.2f} MB" if "carteira" in args.endpoints else "0 MB",
-        "extracao_duracao": f"{consolidated_metrics['extracao']['duracao_segundos']:.1f} s" if "carteira" in args.endpoints else "0 s",
-
-        "processamento_total_arquivos": consolidated_metrics["processamento"]["total_arquivos_processados"] if "carteira" in args.endpoints else 0,
-        "processamento_total_registros": consolidated_metrics["processamento"]["total_registros_inseridos"] if "carteira" in args.endpoints else 0,
-        "processamento_duracao": f"{consolidated_metrics['processamento']['duracao_segundos']:.1f} s" if "carteira" in args.endpoints else "0 s",
-        "processing_rows_carteira": processing_rows_carteira if "carteira" in args.endpoints else [],
-
-        # Rentabilidade
-        "rentabilidade_total_arquivos": consolidated_metrics["rentabilidade"]["total_arquivos_processados"] if "rentabilidade" in args.endpoints else 0,
-        "rentabilidade_total_registros": consolidated_metrics["rentabilidade"]["total_registros_inseridos"] if "rentabilidade" in args.endpoints else 0,
-        "rentabilidade_total_fundos": consolidated_metrics["rentabilidade"]["total_fundos_unicos"] if "rentabilidade" in args.endpoints else 0,
-        "rentabilidade_duracao": f"{consolidated_metrics['rentabilidade']['duracao_segundos']:.1f} s" if "rentabilidade" in args.endpoints else "0 s",
-        "processing_rows_rent": processing_rows_rent if "rentabilidade" in args.endpoints else [],
-        "detalhamento_por_fundo_rent": detalhamento_por_fundo_rent if "rentabilidade" in args.endpoints else [],
-
-        # Extrato
-        "extrato_total_arquivos": consolidated_metrics["extrato"]["total_arquivos_processados"] if "extrato" in args.endpoints else 0,
-        "extrato_total_registros": consolidated_metrics["extrato"]["total_registros_inseridos"] if "extrato" in args.endpoints else 0,
-        "extrato_duracao": f"{consolidated_metrics['extrato']['duracao_segundos']:.1f} s" if "extrato" in args.endpoints else "0 s",
-        "processing_rows_extrato": processing_rows_extrato if "extrato" in args.endpoints else [],
-
-        # Seções extras
-        "skipped_files_section": "",
-        "critical_funds_section": "",
-        "missing_funds_section": "",
+        "duracao_total": _secs(duracao_global),
         "errors_section": "",
-
-        "execution_id": datetime.datetime.now().isoformat(),
-        "log_path": str(log_file_path)
+        "execution_id": report_time.isoformat(),
     }
 
-    # Adicionar seção de erros
-    all_errors = []
     for endpoint in args.endpoints:
-        if endpoint == "carteira":
-            for key in ["extracao", "processamento"]:
-                if consolidated_metrics[key]["erros"]:
-                    all_errors.extend([f"Carteira ({key.title()}): {err}" for err in consolidated_metrics[key]["erros"]])
-        elif endpoint in ["rentabilidade", "extrato"]:
-            if consolidated_metrics[endpoint]["erros"]:
-                all_errors.extend([f"{endpoint.title()}: {err}" for err in consolidated_metrics[endpoint]["erros"]])
-    
-    if all_errors:
-        final_ctx["errors_section"] = "<ul>" + "".join([f"<li>{err}</li>" for err in all_errors]) + "</ul>"
+        final_ctx.update(_ENDPOINT_CTX[endpoint](consolidated_metrics))
+
+    # Adicionar seção de erros
+    errors_html = "".join(_iter_error_items(consolidated_metrics, args.endpoints))
+    final_ctx["errors_section"] = f"<ul>{errors_html}</ul>" if errors_html else ""
 
     # Definir assunto do email
     endpoints_str = " + ".join([ep.title() for ep in args.endpoints])
@@ -725,15 +1035,21 @@ def main():
     logger.info(f"Endpoints processados: {args.endpoints}")
     logger.info(f"Duração total: {duracao_global:.1f}s")
     
-    if "carteira" in args.endpoints:
-        logger.info(f"Carteira: {consolidated_metrics['extracao']['num_arquivos']} arquivos, {consolidated_metrics['processamento']['total_registros_inseridos']} registros")
-    if "rentabilidade" in args.endpoints:
-        logger.info(f"Rentabilidade: {consolidated_metrics['rentabilidade']['total_arquivos_processados']} arquivos, {consolidated_metrics['rentabilidade']['total_registros_inseridos']} registros, {consolidated_metrics['rentabilidade']['total_fundos_unicos']} fundos únicos")
-    if "extrato" in args.endpoints:
-        logger.info(f"Extrato: {consolidated_metrics['extrato']['total_arquivos_processados']} arquivos, {consolidated_metrics['extrato']['total_registros_inseridos']} registros")
+    if "carteira" in endpoints:
+        ext_n = consolidated_metrics["extracao"].num_arquivos
+        proc_r = consolidated_metrics["processamento"].total_registros_inseridos
+        logger.info(f"Carteira: {ext_n} arquivos, {proc_r} registros")
+    if "rentabilidade" in endpoints:
+        m_rent = consolidated_metrics["rentabilidade"]
+        logger.info(f"Rentabilidade: {m_rent.total_arquivos_processados} arquivos, {m_rent.total_registros_inseridos} registros, {m_rent.total_fundos_unicos} fundos únicos")
+    if "extrato" in endpoints:
+        m_extrato = consolidated_metrics["extrato"]
+        logger.info(f"Extrato: {m_extrato.total_arquivos_processados} arquivos, {m_extrato.total_registros_inseridos} registros")
 
     # Envio do email (se configurado)
-    if RECEIVER_EMAIL:
+    if args.dry_run:
+        logger.info("Modo --dry-run: envio de email desativado")
+    elif RECEIVER_EMAIL:
         try:
             logger.info("Enviando relatório por email...")
             notification_manager.send_with_template(
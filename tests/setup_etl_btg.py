@@ -11,8 +11,10 @@ Descrição: Configura automaticamente o ambiente para o ETL BTG
 
 import os
 import sys
+import mmap
 import subprocess
 import argparse
+from importlib.metadata import version, PackageNotFoundError
 from pathlib import Path
 from typing import List
 
@@ -21,6 +23,36 @@ ROOT_PATH = Path(__file__).resolve().parents[2]
 if str(ROOT_PATH) not in sys.path:
     sys.path.insert(0, str(ROOT_PATH))
 
+# DDL da tabela de rentabilidade (constante: usada na criação e no fallback manual)
+_RENT_TABLE_DDL = """
+-- Criação da tabela Ft_RentabilidadeDiaria
+CREATE TABLE IF NOT EXISTS `Ft_RentabilidadeDiaria` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `NmFundo` varchar(255) DEFAULT NULL,
+  `CdConta` varchar(100) DEFAULT NULL,
+  `CnpjFundo` varchar(20) DEFAULT NULL,
+  `DtPosicao` date DEFAULT NULL,
+  `VlrCotacao` decimal(18,8) DEFAULT NULL,
+  `VlrCotacaoBruta` decimal(18,8) DEFAULT NULL,
+  `VlrPatrimonio` decimal(18,2) DEFAULT NULL,
+  `QtdCota` decimal(18,8) DEFAULT NULL,
+  `VlrAplicacao` decimal(18,2) DEFAULT NULL,
+  `VlrResgate` decimal(18,2) DEFAULT NULL,
+  `RentDia` decimal(10,6) DEFAULT NULL,
+  `RentMes` decimal(10,6) DEFAULT NULL,
+  `RentAno` decimal(10,6) DEFAULT NULL,
+  `RentDiaVsCDI` decimal(10,6) DEFAULT NULL,
+  `RentMesVsCDI` decimal(10,6) DEFAULT NULL,
+  `RentAnoVsCDI` decimal(10,6) DEFAULT NULL,
+  `TpClasse` varchar(100) DEFAULT NULL,
+  `DtInclusao` timestamp DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  KEY `idx_rentabilidade_fundo_data` (`NmFundo`,`DtPosicao`),
+  KEY `idx_rentabilidade_data` (`DtPosicao`),
+  KEY `idx_rentabilidade_cnpj` (`CnpjFundo`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+"""
+
 class ETLSetup:
     """Classe para configuração automatizada do ETL BTG"""
     
@@ -32,12 +64,25 @@ class ETLSetup:
         """Instala os pacotes Python necessários"""
         packages = ['mysql-connector-python', 'python-dotenv']
         
-        print(f"🔧 Instalando pacotes: {', '.join(packages)}")
+        # Só chama o pip (caro para iniciar) se algum pacote estiver faltando
+        missing = []
+        for pkg in packages:
+            try:
+                version(pkg)
+            except PackageNotFoundError:
+                missing.append(pkg)
+        
+        if not missing:
+            print("✅ Pacotes já instalados")
+            return True
+        
+        print(f"🔧 Instalando pacotes: {', '.join(missing)}")
         
         try:
             subprocess.check_call([
-                sys.executable, '-m', 'pip', 'install'
-            ] + packages)
+                sys.executable, '-m', 'pip', 'install',
+                '--no-input', '--disable-pip-version-check'
+            ] + missing)
             print("✅ Pacotes instalados com sucesso!")
             return True
         except subprocess.CalledProcessError as e:
@@ -48,14 +93,15 @@ class ETLSetup:
         """Atualiza o arquivo .env com as variáveis necessárias"""
         print("🔧 Verificando arquivo .env...")
         
-        # Verificar se DB_RENTABILIDADE existe
-        env_content = ""
-        if self.env_file.exists():
-            with open(self.env_file, 'r', encoding='utf-8') as f:
-                env_content = f.read()
+        # Verificar se DB_RENTABILIDADE existe (busca nos bytes, sem decodificar o arquivo)
+        found = False
+        if self.env_file.exists() and self.env_file.stat().st_size > 0:
+            with open(self.env_file, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                found = mm.find(b'DB_RENTABILIDADE') != -1
         
         # Adicionar DB_RENTABILIDADE se não existir
-        if 'DB_RENTABILIDADE' not in env_content:
+        if not found:
             print("📝 Adicionando variável DB_RENTABILIDADE ao .env")
             
             # Adicionar ao final do arquivo
@@ -71,34 +117,7 @@ class ETLSetup:
     
     def create_rentabilidade_table_sql(self) -> str:
         """Retorna o SQL para criar a tabela de rentabilidade"""
-        return """
--- Criação da tabela Ft_RentabilidadeDiaria
-CREATE TABLE IF NOT EXISTS `Ft_RentabilidadeDiaria` (
-  `id` bigint NOT NULL AUTO_INCREMENT,
-  `NmFundo` varchar(255) DEFAULT NULL,
-  `CdConta` varchar(100) DEFAULT NULL,
-  `CnpjFundo` varchar(20) DEFAULT NULL,
-  `DtPosicao` date DEFAULT NULL,
-  `VlrCotacao` decimal(18,8) DEFAULT NULL,
-  `VlrCotacaoBruta` decimal(18,8) DEFAULT NULL,
-  `VlrPatrimonio` decimal(18,2) DEFAULT NULL,
-  `QtdCota` decimal(18,8) DEFAULT NULL,
-  `VlrAplicacao` decimal(18,2) DEFAULT NULL,
-  `VlrResgate` decimal(18,2) DEFAULT NULL,
-  `RentDia` decimal(10,6) DEFAULT NULL,
-  `RentMes` decimal(10,6) DEFAULT NULL,
-  `RentAno` decimal(10,6) DEFAULT NULL,
-  `RentDiaVsCDI` decimal(10,6) DEFAULT NULL,
-  `RentMesVsCDI` decimal(10,6) DEFAULT NULL,
-  `RentAnoVsCDI` decimal(10,6) DEFAULT NULL,
-  `TpClasse` varchar(100) DEFAULT NULL,
-  `DtInclusao` timestamp DEFAULT CURRENT_TIMESTAMP,
-  PRIMARY KEY (`id`),
-  KEY `idx_rentabilidade_fundo_data` (`NmFundo`,`DtPosicao`),
-  KEY `idx_rentabilidade_data` (`DtPosicao`),
-  KEY `idx_rentabilidade_cnpj` (`CnpjFundo`)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
-"""
+        return _RENT_TABLE_DDL
     
     def create_database_table(self) -> bool:
         """Tenta criar a tabela de rentabilidade no banco"""
@@ -113,22 +132,26 @@ CREATE TABLE IF NOT EXISTS `Ft_RentabilidadeDiaria` (
             
             connector = MySQLConnector.from_env()
             
-            # Verificar se a tabela já existe
             try:
-                count = connector.query_single_value("SELECT COUNT(*) FROM Ft_RentabilidadeDiaria")
-                print(f"✅ Tabela Ft_RentabilidadeDiaria já existe com {count:,} registros")
-                connector.close()
-                return True
-            except:
-                # Tabela não existe, criar
+                # Verificar no catálogo se a tabela já existe (sem varrer a tabela)
+                exists = connector.query_single_value(
+                    "SELECT 1 FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s LIMIT 1",
+                    ("Ft_RentabilidadeDiaria",)
+                )
+                if exists:
+                    print("✅ Tabela Ft_RentabilidadeDiaria já existe")
+                    return True
+                
                 print("📝 Criando tabela Ft_RentabilidadeDiaria...")
                 
                 sql = self.create_rentabilidade_table_sql()
                 connector.execute_update(sql)
                 
                 print("✅ Tabela Ft_RentabilidadeDiaria criada com sucesso!")
-                connector.close()
                 return True
+            finally:
+                connector.close()
                 
         except Exception as e:
             print(f"❌ Erro ao criar tabela: {e}")
@@ -150,6 +173,10 @@ CREATE TABLE IF NOT EXISTS `Ft_RentabilidadeDiaria` (
         print("🔧 Criando diretórios necessários...")
         
         for directory in directories:
+            # Um único stat para diretórios já existentes (caso comum em execuções repetidas)
+            if directory.is_dir():
+                print(f"✅ Diretório já existe: {directory.relative_to(self.root_path)}")
+                continue
             try:
                 directory.mkdir(parents=True, exist_ok=True)
                 print(f"✅ Diretório criado: {directory.relative_to(self.root_path)}")
@@ -170,16 +197,19 @@ CREATE TABLE IF NOT EXISTS `Ft_RentabilidadeDiaria` (
                 print(f"❌ Script de validação não encontrado: {validate_script}")
                 return False
             
-            result = subprocess.run([
+            # Repassa a saída da validação em tempo real, sem acumulá-la em memória
+            with subprocess.Popen([
                 sys.executable, str(validate_script), "--quick"
-            ], capture_output=True, text=True)
+            ], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1) as proc:
+                for line in proc.stdout:
+                    print(f"   {line}", end="")
+                returncode = proc.wait()
             
-            if result.returncode == 0:
+            if returncode == 0:
                 print("✅ Validação executada com sucesso!")
                 return True
             else:
-                print(f"⚠️  Validação encontrou problemas:")
-                print(result.stdout)
+                print(f"⚠️  Validação encontrou problemas (código {returncode}) - veja a saída acima")
                 return False
                 
         except Exception as e:
@@ -9,16 +9,24 @@ Versão: 1.0.0
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import datetime
 import json
 import time
 import sys
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Dict, Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-ROOT_PATH = Path(__file__).resolve().parents(2)
+ROOT_PATH = Path(__file__).resolve().parents[2]
 if str(ROOT_PATH) not in sys.path:
     sys.path.insert(0, str(ROOT_PATH))
 
@@ -37,10 +45,57 @@ SCOPE = os.getenv("SCOPE_EXTRATO")
 EXTRATO_URL = os.getenv("EXTRATO_URL", "https://funds.btgpactual.com/reports/Cash/FundAccountStatement")
 TICKET_URL = os.getenv("TICKET_URL")
 
+# Sufixos ISO do intervalo de um dia na API de extrato
+ISO_START = "T00:00:00.000Z"
+ISO_END = "T23:59:59.000Z"
+
+# Sessão HTTP compartilhada pelas threads: reaproveita conexões TLS com a API
+_POOL_SIZE = 16
+
+def _make_adapter(pool_size: int) -> HTTPAdapter:
+    """Adapter com pool de conexões do tamanho informado e retry em erros de gateway."""
+    return HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+    )
+
+_SESSION = requests.Session()
+_SESSION.mount("https://", _make_adapter(_POOL_SIZE))
+_SESSION.headers.update({"Accept": "application/json"})
+
+# Intervalo mínimo entre solicitações de ticket, compartilhado pelas threads
+MIN_REQUEST_INTERVAL = 2.0
+_rate_lock = threading.Lock()
+_next_request_at = 0.0
+
+def wait_rate_limit() -> None:
+    """Espaça as solicitações de ticket em MIN_REQUEST_INTERVAL segundos entre si."""
+    global _next_request_at
+    with _rate_lock:
+        now = time.monotonic()
+        wait = _next_request_at - now
+        _next_request_at = max(now, _next_request_at) + MIN_REQUEST_INTERVAL
+    if wait > 0:
+        time.sleep(wait)
+
+# Espera entre consultas ao ticket (backoff exponencial): uma consulta antes de cada espera
+# e uma consulta final, ou seja, len(POLL_DELAYS) + 1 tentativas (~14s de espera no total)
+POLL_DELAYS = (2, 4, 8)
+
+def retry_delay(resp: requests.Response, default: float) -> float:
+    """Usa o Retry-After (em segundos) enviado pela API, se houver; senão o backoff padrão."""
+    retry_after = resp.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    return default
+
 def get_token() -> str:
     """Obtém token de autenticação."""
     headers = {
-        "Accept": "application/json",
         "Content-Type": "application/x-www-form-urlencoded"
     }
     data = {
@@ -50,7 +105,7 @@ def get_token() -> str:
         "scope": SCOPE
     }
     
-    resp = requests.post(AUTH_URL, headers=headers, data=data, timeout=30)
+    resp = _SESSION.post(AUTH_URL, headers=headers, data=data, timeout=30)
     resp.raise_for_status()
     token = resp.json().get("access_token")
     if not token:
@@ -63,25 +118,25 @@ def test_date(date_str: str, token: str) -> Dict[str, Any]:
     Retorna informações sobre o resultado.
     """
     print(f"🧪 Testando {date_str}...")
+    wait_rate_limit()
     
     try:
         # Solicitar ticket
         headers = {
-            "Accept": "application/json",
             "X-SecureConnect-Token": token,
             "Content-Type": "application/json-patch+json"
         }
         payload = {
             "contract": {
-                "startDate": f"{date_str}T00:00:00.000Z",
-                "endDate": f"{date_str}T23:59:59.000Z",
+                "startDate": date_str + ISO_START,
+                "endDate": date_str + ISO_END,
                 "fundName": ""
             },
             "pageSize": 100,
             "webhookEndpoint": ""
         }
         
-        resp = requests.post(EXTRATO_URL, headers=headers, json=payload, timeout=30)
+        resp = _SESSION.post(EXTRATO_URL, headers=headers, json=payload, timeout=30)
         resp.raise_for_status()
         ticket = resp.json().get("ticket")
         
@@ -96,27 +151,30 @@ def test_date(date_str: str, token: str) -> Dict[str, Any]:
         # Aguardar um pouco
         time.sleep(3)
         
-        # Tentar obter dados (máximo 3 tentativas rápidas)
+        # Tentar obter dados, com espera crescente entre as tentativas
         url = f"{TICKET_URL}?ticketId={ticket}&pageNumber=1"
+        max_attempts = len(POLL_DELAYS) + 1
         
-        for attempt in range(1, 4):
+        # Na última tentativa não há espera seguinte (delay None, nunca usado)
+        for attempt, delay in enumerate((*POLL_DELAYS, None), 1):
             try:
-                resp = requests.get(url, headers=headers, timeout=20)
+                resp = _SESSION.get(url, headers=headers, timeout=20)
                 
                 if resp.status_code == 200:
                     data = resp.json()
                     result = data.get("result")
                     
                     if result == "Aguardando processamento" or result == "Processando":
-                        if attempt < 3:
-                            print(f"   ⏳ Tentativa {attempt}: Processando... aguardando 10s")
-                            time.sleep(10)
+                        if attempt < max_attempts:
+                            wait = retry_delay(resp, delay)
+                            print(f"   ⏳ {date_str} tentativa {attempt}: Processando... aguardando {wait:g}s")
+                            time.sleep(wait)
                             continue
                         else:
                             return {
                                 "date": date_str,
                                 "status": "PROCESSING",
-                                "message": "Ainda processando após 3 tentativas",
+                                "message": f"Ainda processando após {max_attempts} tentativas",
                                 "has_data": None,
                                 "attempts": attempt
                             }
@@ -143,9 +201,9 @@ def test_date(date_str: str, token: str) -> Dict[str, Any]:
                         }
                         
                 else:
-                    if attempt < 3:
-                        print(f"   ⚠️ Tentativa {attempt}: HTTP {resp.status_code}")
-                        time.sleep(5)
+                    if attempt < max_attempts:
+                        print(f"   ⚠️ {date_str} tentativa {attempt}: HTTP {resp.status_code}")
+                        time.sleep(retry_delay(resp, delay))
                         continue
                     else:
                         return {
@@ -157,9 +215,9 @@ def test_date(date_str: str, token: str) -> Dict[str, Any]:
                         }
                         
             except Exception as e:
-                if attempt < 3:
-                    print(f"   ❌ Tentativa {attempt}: {str(e)}")
-                    time.sleep(5)
+                if attempt < max_attempts:
+                    print(f"   ❌ {date_str} tentativa {attempt}: {str(e)}")
+                    time.sleep(delay)
                     continue
                 else:
                     return {
@@ -189,26 +247,12 @@ def generate_test_dates(start_date: str, end_date: str, sample_count: int = 10)
     
     if total_days <= sample_count:
         # Se há poucas datas, testar todas
-        dates = []
-        current = start_dt
-        while current <= end_dt:
-            dates.append(current.strftime('%Y-%m-%d'))
-            current += datetime.timedelta(days=1)
-        return dates
-    else:
-        # Amostragem espaçada
-        step = total_days // sample_count
-        dates = []
-        for i in range(sample_count):
-            test_date = start_dt + datetime.timedelta(days=i * step)
-            if test_date <= end_dt:
-                dates.append(test_date.strftime('%Y-%m-%d'))
-        
-        # Sempre incluir a última data
-        if end_dt.strftime('%Y-%m-%d') not in dates:
-            dates.append(end_dt.strftime('%Y-%m-%d'))
-            
-        return dates
+        return [(start_dt + datetime.timedelta(days=i)).isoformat() for i in range(total_days)]
+    
+    # Amostragem espaçada, sempre incluindo a última data (dict.fromkeys remove repetição)
+    step = total_days // sample_count
+    dates = [(start_dt + datetime.timedelta(days=i * step)).isoformat() for i in range(sample_count)]
+    return list(dict.fromkeys(dates + [end_dt.isoformat()]))
 
 def main():
     parser = argparse.ArgumentParser(description='Teste de disponibilidade de dados de extrato')
@@ -216,12 +260,14 @@ def main():
     parser.add_argument('--end-date', type=str, required=True, help='Data final (YYYY-MM-DD)')
     parser.add_argument('--sample-count', type=int, default=10, help='Número de datas para amostrar')
     parser.add_argument('--output', type=str, help='Arquivo para salvar resultados (JSON)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Datas testadas em paralelo (padrão: 4; 0 = todas ao mesmo tempo)')
     
     args = parser.parse_args()
     
     print("🔍 === TESTE DE DISPONIBILIDADE DE DADOS DE EXTRATO ===")
     print(f"📅 Período: {args.start_date} até {args.end_date}")
     print(f"🎯 Amostragem: {args.sample_count} datas")
+    print(f"🧵 Concorrência: {args.concurrency or 'todas as datas'}")
     print()
     
     try:
@@ -242,29 +288,36 @@ def main():
             print(f"   • {date}")
         print()
         
-        # Executar testes
+        # Executar testes em paralelo; wait_rate_limit espaça as chamadas à API
+        # O tempo de cada data é quase todo espera pelo ticket; com --concurrency 0 todas
+        # as datas aguardam juntas e a varredura leva o tempo da data mais lenta
+        workers = args.concurrency if args.concurrency > 0 else len(test_dates)
+        if workers > _POOL_SIZE:
+            _SESSION.mount("https://", _make_adapter(workers))
+        
         results = []
-        for i, date in enumerate(test_dates, 1):
-            print(f"[{i}/{len(test_dates)}] ", end="")
-            result = test_date(date, token)
-            results.append(result)
-            
-            # Status visual
-            status = result["status"]
-            has_data = result.get("has_data")
-            
-            if status == "SUCCESS" and has_data:
-                print(f"   ✅ {result['message']}")
-            elif status == "SUCCESS" and not has_data:
-                print(f"   ⚪ {result['message']}")
-            elif status == "PROCESSING":
-                print(f"   ⏳ {result['message']}")
-            else:
-                print(f"   ❌ {result['message']}")
-            
-            # Pequena pausa entre testes para não sobrecarregar a API
-            if i < len(test_dates):
-                time.sleep(2)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(test_date, date, token): date for date in test_dates}
+            for i, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                
+                # Status visual
+                status = result["status"]
+                has_data = result.get("has_data")
+                prefix = f"[{i}/{len(test_dates)}] {result['date']}"
+                
+                if status == "SUCCESS" and has_data:
+                    print(f"{prefix}   ✅ {result['message']}")
+                elif status == "SUCCESS" and not has_data:
+                    print(f"{prefix}   ⚪ {result['message']}")
+                elif status == "PROCESSING":
+                    print(f"{prefix}   ⏳ {result['message']}")
+                else:
+                    print(f"{prefix}   ❌ {result['message']}")
+        
+        # Resultados na ordem das datas, independente da ordem de conclusão
+        results.sort(key=lambda r: r["date"])
         
         print()
         print("📊 === RESUMO DOS RESULTADOS ===")
@@ -275,22 +328,22 @@ def main():
         without_data = sum(1 for r in results if r.get("has_data") is False)
         processing = sum(1 for r in results if r["status"] == "PROCESSING")
         errors = sum(1 for r in results if r["status"] in ["ERROR", "HTTP_ERROR"])
+        pct = 100.0 / total if total else 0.0
         
         print(f"📈 Total de datas testadas: {total}")
-        print(f"✅ Com dados: {with_data} ({with_data/total*100:.1f}%)")
-        print(f"⚪ Sem dados: {without_data} ({without_data/total*100:.1f}%)")
-        print(f"⏳ Ainda processando: {processing} ({processing/total*100:.1f}%)")
-        print(f"❌ Erros: {errors} ({errors/total*100:.1f}%)")
+        print(f"✅ Com dados: {with_data} ({with_data * pct:.1f}%)")
+        print(f"⚪ Sem dados: {without_data} ({without_data * pct:.1f}%)")
+        print(f"⏳ Ainda processando: {processing} ({processing * pct:.1f}%)")
+        print(f"❌ Erros: {errors} ({errors * pct:.1f}%)")
         print()
         
         # Mostrar datas com dados
-        dates_with_data = [r["date"] for r in results if r.get("has_data") is True]
-        if dates_with_data:
+        results_with_data = [r for r in results if r.get("has_data") is True]
+        if results_with_data:
             print("📅 Datas com dados confirmados:")
-            for date in dates_with_data:
-                result = next(r for r in results if r["date"] == date)
+            for result in results_with_data:
                 count = result.get("record_count", "?")
-                print(f"   • {date} ({count} registros)")
+                print(f"   • {result['date']} ({count} registros)")
         else:
             print("⚠️ Nenhuma data com dados confirmados encontrada")
         
@@ -299,23 +352,27 @@ def main():
         # Salvar resultados se solicitado
         if args.output:
             output_file = Path(args.output)
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "test_info": {
-                        "start_date": args.start_date,
-                        "end_date": args.end_date,
-                        "sample_count": args.sample_count,
-                        "total_tested": total,
-                        "test_timestamp": datetime.datetime.now().isoformat()
-                    },
-                    "summary": {
-                        "with_data": with_data,
-                        "without_data": without_data,
-                        "processing": processing,
-                        "errors": errors
-                    },
-                    "results": results
-                }, f, ensure_ascii=False, indent=2)
+            report = {
+                "test_info": {
+                    "start_date": args.start_date,
+                    "end_date": args.end_date,
+                    "sample_count": args.sample_count,
+                    "total_tested": total,
+                    "test_timestamp": datetime.datetime.now().isoformat()
+                },
+                "summary": {
+                    "with_data": with_data,
+                    "without_data": without_data,
+                    "processing": processing,
+                    "errors": errors
+                },
+                "results": results
+            }
+            # orjson serializa direto para bytes UTF-8; json da stdlib como fallback
+            if orjson is not None:
+                output_file.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+            else:
+                output_file.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
             print(f"💾 Resultados salvos em: {output_file}")
         
         # Recomendações
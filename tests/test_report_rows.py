@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Testes da montagem das linhas de detalhamento do relatório (utils/report_rows.py).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_PATH = Path(__file__).resolve().parents[1]
+if str(ROOT_PATH) not in sys.path:
+    sys.path.insert(0, str(ROOT_PATH))
+
+from utils.report_rows import build_processing_rows, classify_status
+
+
+@pytest.mark.parametrize("status, expected", [
+    (" OK", "success"),
+    ("Sucesso ", "success"),
+    ("  sem dados  ", "skipped"),
+    ("Ignorado\t", "skipped"),
+    (" falha", "failure"),
+    ("SUCESSO PARCIAL ", "success"),
+])
+def test_classify_status_ignores_padding_and_case(status, expected):
+    assert classify_status(status) == expected
+
+
+def test_padded_status_rows():
+    rows = [
+        {"Arquivo": f"F{i}", "Data Processo": "2025-06-02", "Status": status,
+         "Total Linhas": 10, "Inseridos": 10, "Duração (s)": 1.5}
+        for i, status in enumerate([" OK", "Sucesso ", " Sem Dados", "Ignorado ", " ERRO "])
+    ]
+    result = build_processing_rows(rows)
+    assert [r["status_text"] for r in result] == ["success", "success", "skipped", "skipped", "failure"]
+    assert [r["total"] for r in result] == [10, 10, "-", "-", 10]
+
+
+def test_mixed_input_keeps_present_values_and_defaults_missing_keys():
+    # Chaves ausentes recebem o padrão; None presente é mantido; status repetido em várias linhas
+    rows = [
+        {"Arquivo": None, "Status": "OK", "Total Linhas": None, "Inseridos": 3},
+        {"Status": None},
+        {},
+        {"Arquivo": "x.xlsx", "Data Processo": "2025-01-01", "Status": "IGNORADO", "Duração (s)": 2.5},
+    ] * 2
+    expected = [
+        {"fundo": None, "date": "", "total": None, "inserted": 3, "duration": 0, "status_text": "success"},
+        {"fundo": "", "date": "", "total": 0, "inserted": 0, "duration": 0, "status_text": "failure"},
+        {"fundo": "", "date": "", "total": 0, "inserted": 0, "duration": 0, "status_text": "failure"},
+        {"fundo": "x.xlsx", "date": "2025-01-01", "total": "-", "inserted": "-", "duration": "-",
+         "status_text": "skipped"},
+    ] * 2
+    result = build_processing_rows(rows)
+    assert result == expected
+    assert [list(row) for row in result] == [list(row) for row in expected]
@@ -10,53 +10,287 @@ Descrição: Valida dependências, configurações e testa componentes do ETL BT
 """
 
 import os
+import re
+import atexit
 import sys
 import subprocess
 import json
+import hashlib
+import logging
+import multiprocessing
 import argparse
+import contextvars
+import threading
+import time
+from collections import deque
+import sysconfig
+from functools import lru_cache
+from importlib.metadata import distributions
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from datetime import datetime
 
-# Ajustar ROOT_PATH
-ROOT_PATH = Path(__file__).resolve().parents[2]
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Ajustar ROOT_PATH (abspath é puramente léxico: sem resolver symlinks/stat no import)
+ROOT_PATH = Path(os.path.abspath(__file__)).parents[2]
 if str(ROOT_PATH) not in sys.path:
     sys.path.insert(0, str(ROOT_PATH))
 
 from utils.logging_utils import Log, LogLevel
-from utils.mysql_connector_utils import MySQLConnector
 from dotenv import load_dotenv
 
-# Configurar logs
-Log.set_level(LogLevel.INFO)
-Log.set_console_output(True)
 logger = Log.get_logger(__name__)
 
-# Carregar .env
-load_dotenv(ROOT_PATH / '.env')
+@lru_cache(maxsize=1)
+def _env() -> Dict[str, str]:
+    """Carrega o .env uma única vez e devolve um snapshot do ambiente (variáveis do sistema têm precedência)."""
+    load_dotenv(ROOT_PATH / '.env')
+    return dict(os.environ)
+
+def _bootstrap():
+    """Configura logs e carrega o .env; chamado por main(), não no import do módulo."""
+    Log.set_level(LogLevel.INFO)
+    Log.set_console_output(True)
+    # Carregar .env (também popula os.environ, usado por MySQLConnector.from_env)
+    _env()
+
+# Scripts do ETL (nome exibido, caminho), compartilhados pela checagem de arquivos e pelo teste --help
+BASE_DIR = ROOT_PATH / "backend" / "api_btg"
+ETL_SCRIPTS = (
+    ("Orquestrador Principal", BASE_DIR / "orquestrador_btg.py"),
+    ("Extração Portfolio", BASE_DIR / "api_faas_portfolio.py"),
+    ("Extração Rentabilidade", BASE_DIR / "api_faas_rentabilidade.py"),
+    ("Inserção Carteira", BASE_DIR / "insert_db" / "insert_carteira.py"),
+    ("Inserção Rentabilidade", BASE_DIR / "insert_db" / "insert_rentabilidade.py"),
+)
+# Comando --help de cada script, montado uma única vez
+_HELP_COMMANDS = {path: [sys.executable, str(path), "--help"] for _, path in ETL_SCRIPTS}
+
+REQUIRED_ENV_VARS = (
+    'MYSQL_HOST', 'MYSQL_USER', 'MYSQL_PASSWORD', 'MYSQL_DATABASE',
+    'MYSQL_TABLE', 'DB_RENTABILIDADE', 'SMTP_SERVER', 'SMTP_USERNAME',
+    'SMTP_PASSWORD', 'RECEIVER_EMAIL'
+)
+# Variáveis cujo valor é mascarado no log, definidas uma vez
+SENSITIVE_ENV_VARS = frozenset(
+    var for var in REQUIRED_ENV_VARS if any(tag in var for tag in ('PASSWORD', 'SECRET', 'KEY'))
+)
+
+CONFIG_FILES = (
+    ("Mapeamento de Colunas", ROOT_PATH / "configs" / "mappings" / "column_mapping.json"),
+    ("Mapeamento de Fundos", ROOT_PATH / "configs" / "mappings" / "fund_mapping.json"),
+    ("Mapeamento de Descrições", ROOT_PATH / "configs" / "mappings" / "descricao_mapping.json"),
+    ("Mapeamento de Grupos", ROOT_PATH / "configs" / "mappings" / "grupo_mapping.json"),
+    ("Mapeamento de Tipos", ROOT_PATH / "configs" / "mappings" / "fund_type_mapping.json"),
+    ("Template de Email", ROOT_PATH / "configs" / "templates" / "btg_carteira_report.html"),
+)
+
+# Cache em disco das verificações aprovadas (--trust-seconds). Só entram verificações
+# locais e determinísticas; MySQL, diretórios e --help sempre rodam.
+VALIDATOR_CACHE_FILE = ROOT_PATH / ".validator_cache.json"
+CACHEABLE_CHECKS = frozenset({
+    "Versão Python", "Pacotes Python", "Variáveis de Ambiente", "Scripts", "Arquivos de Configuração",
+})
+
+# Buffer de log da verificação em execução (run_full_validation); sem buffer, as
+# mensagens vão para a fila geral de ETLValidator.flush_logs
+_check_logs = contextvars.ContextVar("_check_logs", default=None)
+
+# Abaixo deste volume total, abrir processos custa mais que validar os JSONs em sequência
+PARALLEL_JSON_MIN_BYTES = 8 * 1024 * 1024
+
+def _validate_json(path: str) -> Optional[str]:
+    """Lê e valida o JSON em path; retorna a mensagem de erro ou None se válido (usado também em subprocessos)."""
+    data = Path(path).read_bytes()
+    try:
+        # orjson valida direto dos bytes (C); erros dele também são json.JSONDecodeError
+        if orjson is not None:
+            orjson.loads(data)
+        else:
+            json.loads(data.decode('utf-8'))
+        return None
+    except json.JSONDecodeError as e:
+        return str(e)
+
+def _files_fingerprint() -> Dict[str, Any]:
+    """
+    mtime (ns) dos arquivos dos quais as verificações em cache dependem, mais um hash dos
+    valores das variáveis obrigatórias (podem vir do shell/CI, não só do .env); qualquer
+    alteração (inclusive instalar/remover pacotes, que altera o site-packages) invalida o cache.
+    """
+    paths = [ROOT_PATH / '.env', Path(sys.executable), Path(sysconfig.get_paths()["purelib"])]
+    paths.extend(path for _, path in ETL_SCRIPTS)
+    paths.extend(path for _, path in CONFIG_FILES)
+    
+    fingerprint = {}
+    for path in paths:
+        try:
+            fingerprint[str(path)] = path.stat().st_mtime_ns
+        except OSError:
+            fingerprint[str(path)] = None
+    
+    # Hash (não os valores, que incluem senhas) de presença + conteúdo de cada variável
+    env = _env()
+    env_hash = hashlib.sha256()
+    for var in REQUIRED_ENV_VARS:
+        value = env.get(var)
+        env_hash.update(var.encode() + (b"\x01" + value.encode() if value is not None else b"\x00") + b"\x02")
+    fingerprint["env:sha256"] = env_hash.hexdigest()
+    return fingerprint
+
+def _load_validator_cache() -> Dict[str, Any]:
+    """Lê o cache de verificações; arquivo ausente ou corrompido equivale a cache vazio."""
+    try:
+        return json.loads(VALIDATOR_CACHE_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+@lru_cache(maxsize=1)
+def _get_connector():
+    """
+    Conector MySQL (com pool) criado na primeira checagem e reutilizado pelas seguintes,
+    evitando novo handshake/autenticação a cada validação no mesmo processo.
+    Import tardio: o módulo puxa pandas/mysql-connector, desnecessários no modo --quick.
+    """
+    from utils.mysql_connector_utils import MySQLConnector
+    _env()  # from_env lê os.environ: garante o .env carregado
+    connector = MySQLConnector.from_env()
+    atexit.register(connector.close)
+    return connector
+
+def _normalize_dist_name(name: str) -> str:
+    """Normaliza o nome de uma distribuição (PEP 503) para comparação."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+@lru_cache(maxsize=1)
+def _installed_distributions() -> frozenset:
+    """
+    Nomes normalizados das distribuições instaladas. Lê apenas metadados (nenhum módulo
+    é importado) e é calculado uma vez por processo, reaproveitado entre validações.
+    """
+    return frozenset(
+        _normalize_dist_name(dist.metadata['Name']) for dist in distributions() if dist.metadata['Name']
+    )
+
+def _existing_paths(paths: List[Path]) -> set:
+    """Retorna quais dos caminhos existem, listando cada diretório pai uma única vez (os.scandir)."""
+    by_parent: Dict[Path, List[Path]] = {}
+    for path in paths:
+        by_parent.setdefault(path.parent, []).append(path)
+    
+    existing = set()
+    for parent, children in by_parent.items():
+        try:
+            with os.scandir(parent) as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            continue
+        existing.update(child for child in children if child.name in names)
+    return existing
 
 class ETLValidator:
     """Classe para validação completa do ETL BTG"""
     
-    def __init__(self):
-        self.errors = []
-        self.warnings = []
-        self.success_checks = []
+    def __init__(self, with_counts: bool = False, trust_seconds: int = 0):
+        self.with_counts = with_counts
+        self.trust_seconds = trust_seconds
+        # Cache de verificações aprovadas, só carregado quando --trust-seconds está ativo
+        self._cache: Dict[str, Any] = {}
+        self._fingerprint: Dict[str, Any] = {}
+        if trust_seconds > 0:
+            self._cache = _load_validator_cache()
+            self._fingerprint = _files_fingerprint()
+        # deque: append O(1) sem realocação; convertidos em lista só no relatório
+        self.errors = deque()
+        self.warnings = deque()
+        self.success_checks = deque()
+        # As verificações rodam em threads e registram resultados concorrentemente
+        self._lock = threading.Lock()
+        # Mensagens de log pendentes (nível, texto), emitidas em lote por flush_logs
+        self._pending_logs: List[Tuple[int, str]] = []
         
     def log_success(self, message: str):
         """Registra um teste bem-sucedido"""
-        self.success_checks.append(message)
-        logger.info(f"✅ {message}")
+        with self._lock:
+            self.success_checks.append(message)
+            self._buffer_log(logging.INFO, f"✅ {message}")
         
     def log_warning(self, message: str):
         """Registra um aviso"""
-        self.warnings.append(message)
-        logger.warning(f"⚠️  {message}")
+        with self._lock:
+            self.warnings.append(message)
+            self._buffer_log(logging.WARNING, f"⚠️  {message}")
         
     def log_error(self, message: str):
         """Registra um erro"""
-        self.errors.append(message)
-        logger.error(f"❌ {message}")
+        with self._lock:
+            self.errors.append(message)
+            self._buffer_log(logging.ERROR, f"❌ {message}")
+    
+    def _buffer_log(self, level: int, message: str):
+        """Guarda a mensagem no buffer da verificação em execução ou na fila geral (chamar com _lock)"""
+        buffer = _check_logs.get()
+        (self._pending_logs if buffer is None else buffer).append((level, message))
+    
+    def flush_logs(self, buffer: Optional[List[Tuple[int, str]]] = None):
+        """Emite no logger as mensagens do buffer informado ou, sem buffer, as da fila geral desde o último flush"""
+        with self._lock:
+            if buffer is None:
+                pending, self._pending_logs = self._pending_logs, []
+            else:
+                pending = list(buffer)
+                buffer.clear()
+        for level, message in pending:
+            logger.log(level, message)
+
+    def _run_check_buffered(self, buffer: List[Tuple[int, str]], check_name: str, check_function) -> bool:
+        """run_check com as mensagens da verificação guardadas em buffer, para emiti-las juntas ao concluir"""
+        token = _check_logs.set(buffer)
+        try:
+            return self.run_check(check_name, check_function)
+        finally:
+            _check_logs.reset(token)
+
+    def run_check(self, check_name: str, check_function) -> bool:
+        """
+        Executa uma verificação, reaproveitando o resultado aprovado em cache quando
+        --trust-seconds está ativo, o TTL não expirou e os arquivos não mudaram.
+        """
+        use_cache = self.trust_seconds > 0 and check_name in CACHEABLE_CHECKS
+        
+        if use_cache:
+            entry = self._cache.get(check_name)
+            if entry and entry.get("fingerprint") == self._fingerprint:
+                age = time.time() - entry.get("timestamp", 0)
+                if 0 <= age < self.trust_seconds:
+                    self.log_success(f"{check_name}: aprovado há {age:.0f}s (cache, --trust-seconds)")
+                    return True
+        
+        passed = check_function()
+        
+        if use_cache:
+            with self._lock:
+                if passed:
+                    self._cache[check_name] = {"timestamp": time.time(), "fingerprint": self._fingerprint}
+                else:
+                    self._cache.pop(check_name, None)
+        return passed
+    
+    def save_cache(self):
+        """Grava o cache de verificações aprovadas (apenas com --trust-seconds)"""
+        if self.trust_seconds <= 0:
+            return
+        try:
+            with self._lock:
+                payload = json.dumps(self._cache)
+            VALIDATOR_CACHE_FILE.write_text(payload, encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"⚠️  Não foi possível gravar o cache de validação: {e}")
 
     def check_python_version(self) -> bool:
         """Verifica se a versão do Python é adequada"""
@@ -77,11 +311,12 @@ class ETLValidator:
         
         missing_packages = []
         
+        installed = _installed_distributions()
+        
         for package in required_packages:
-            try:
-                __import__(package.replace('-', '_'))
+            if _normalize_dist_name(package) in installed:
                 self.log_success(f"Pacote {package} encontrado")
-            except ImportError:
+            else:
                 missing_packages.append(package)
                 self.log_error(f"Pacote {package} não encontrado")
         
@@ -93,19 +328,16 @@ class ETLValidator:
 
     def check_environment_variables(self) -> bool:
         """Verifica se as variáveis de ambiente necessárias estão configuradas"""
-        required_vars = [
-            'MYSQL_HOST', 'MYSQL_USER', 'MYSQL_PASSWORD', 'MYSQL_DATABASE',
-            'MYSQL_TABLE', 'DB_RENTABILIDADE', 'SMTP_SERVER', 'SMTP_USERNAME',
-            'SMTP_PASSWORD', 'RECEIVER_EMAIL'
-        ]
+        required_vars = REQUIRED_ENV_VARS
         
         missing_vars = []
+        env = _env()
         
         for var in required_vars:
-            value = os.getenv(var)
+            value = env.get(var)
             if value:
                 # Não mostrar senhas completas
-                if 'PASSWORD' in var:
+                if var in SENSITIVE_ENV_VARS:
                     display_value = f"{value[:3]}***{value[-2:]}" if len(value) > 5 else "***"
                 else:
                     display_value = value
@@ -123,34 +355,42 @@ class ETLValidator:
     def check_mysql_connection(self) -> bool:
         """Testa a conexão com o banco MySQL"""
         try:
-            connector = MySQLConnector.from_env()
+            connector = _get_connector()
             
-            # Teste de conexão simples
-            result = connector.query_single_value("SELECT 1 as test")
-            if result == 1:
-                self.log_success("Conexão MySQL estabelecida com sucesso")
-                
-                # Verificar se as tabelas existem
-                tables_to_check = [
-                    os.getenv('MYSQL_TABLE', 'Ft_CarteiraDiaria'),
-                    os.getenv('DB_RENTABILIDADE', 'Ft_RentabilidadeDiaria')
-                ]
+            # Teste de conexão: ping do driver, sem round-trip de consulta SQL
+            with connector.get_connection() as connection:
+                connection.ping(reconnect=False, attempts=1)
+            self.log_success("Conexão MySQL estabelecida com sucesso")
+            
+            # Verificar se as tabelas existem
+            env = _env()
+            tables_to_check = [
+                env.get('MYSQL_TABLE', 'Ft_CarteiraDiaria'),
+                env.get('DB_RENTABILIDADE', 'Ft_RentabilidadeDiaria')
+            ]
+            
+            # Uma única consulta ao catálogo: existência + estimativa de linhas, sem varrer as tabelas
+            try:
+                rows = connector.execute_query(
+                    "SELECT table_name AS nome, table_rows AS linhas FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name IN (%s, %s)",
+                    tuple(tables_to_check)
+                )
+                found = {row["nome"]: row["linhas"] for row in rows}
                 
                 for table in tables_to_check:
-                    try:
-                        count = connector.query_single_value(f"SELECT COUNT(*) FROM {table}")
+                    if table not in found:
+                        self.log_error(f"Tabela {table} não existe - execute o SQL de criação")
+                    elif self.with_counts:
+                        # Contagem exata (varre a tabela) apenas quando solicitada
+                        count = connector.query_single_value(f"SELECT COUNT(*) FROM `{table}`")
                         self.log_success(f"Tabela {table} existe com {count:,} registros")
-                    except Exception as e:
-                        if "doesn't exist" in str(e):
-                            self.log_error(f"Tabela {table} não existe - execute o SQL de criação")
-                        else:
-                            self.log_error(f"Tabela {table} não encontrada ou inacessível: {e}")
-                
-                connector.close()
-                return True
-            else:
-                self.log_error("Teste de conexão MySQL falhou")
-                return False
+                    else:
+                        self.log_success(f"Tabela {table} existe com ~{found[table] or 0:,} registros (estimativa)")
+            except Exception as e:
+                self.log_error(f"Tabelas não encontradas ou inacessíveis: {e}")
+            
+            return True
                 
         except Exception as e:
             self.log_error(f"Erro ao conectar ao MySQL: {e}")
@@ -158,20 +398,13 @@ class ETLValidator:
 
     def check_script_files(self) -> bool:
         """Verifica se todos os scripts necessários existem"""
-        base_dir = ROOT_PATH / "backend" / "api_btg"
-        
-        scripts_to_check = [
-            ("Orquestrador Principal", base_dir / "orquestrador_btg.py"),
-            ("Extração Portfolio", base_dir / "api_faas_portfolio.py"),
-            ("Extração Rentabilidade", base_dir / "api_faas_rentabilidade.py"),
-            ("Inserção Carteira", base_dir / "insert_db" / "insert_carteira.py"),
-            ("Inserção Rentabilidade", base_dir / "insert_db" / "insert_rentabilidade.py"),
-        ]
+        scripts_to_check = ETL_SCRIPTS
         
         all_found = True
+        existing = _existing_paths([path for _, path in scripts_to_check])
         
         for name, path in scripts_to_check:
-            if path.exists():
+            if path in existing:
                 self.log_success(f"Script {name} encontrado: {path.name}")
             else:
                 self.log_error(f"Script {name} não encontrado: {path}")
@@ -181,34 +414,59 @@ class ETLValidator:
 
     def check_configuration_files(self) -> bool:
         """Verifica se os arquivos de configuração existem"""
-        config_files = [
-            ("Mapeamento de Colunas", ROOT_PATH / "configs" / "mappings" / "column_mapping.json"),
-            ("Mapeamento de Fundos", ROOT_PATH / "configs" / "mappings" / "fund_mapping.json"),
-            ("Mapeamento de Descrições", ROOT_PATH / "configs" / "mappings" / "descricao_mapping.json"),
-            ("Mapeamento de Grupos", ROOT_PATH / "configs" / "mappings" / "grupo_mapping.json"),
-            ("Mapeamento de Tipos", ROOT_PATH / "configs" / "mappings" / "fund_type_mapping.json"),
-            ("Template de Email", ROOT_PATH / "configs" / "templates" / "btg_carteira_report.html"),
-        ]
+        config_files = CONFIG_FILES
         
         all_found = True
+        existing = _existing_paths([path for _, path in config_files])
+        # sha256 dos JSONs já validados (--trust-seconds): conteúdo igual dispensa novo parse
+        use_hashes = self.trust_seconds > 0
+        with self._lock:
+            known_hashes = dict(self._cache.get("_json_hashes", {}))
+        
+        # JSONs que precisam de parse: (nome, caminho, sha256 ou None)
+        to_parse = []
         
         for name, path in config_files:
-            if path.exists():
+            if path in existing:
                 # Verificar se JSONs são válidos
                 if path.suffix == '.json':
-                    try:
-                        with open(path, 'r', encoding='utf-8') as f:
-                            json.load(f)
+                    digest = hashlib.sha256(path.read_bytes()).hexdigest() if use_hashes else None
+                    if digest is not None and known_hashes.get(str(path)) == digest:
                         self.log_success(f"Arquivo {name} válido: {path.name}")
-                    except json.JSONDecodeError as e:
-                        self.log_error(f"Arquivo {name} tem JSON inválido: {e}")
-                        all_found = False
+                    else:
+                        to_parse.append((name, path, digest))
                 else:
                     self.log_success(f"Arquivo {name} encontrado: {path.name}")
             else:
                 self.log_error(f"Arquivo {name} não encontrado: {path}")
                 all_found = False
         
+        # Só distribui entre processos quando o volume compensa o custo de criá-los; cada
+        # processo recebe o caminho e lê o arquivo, em vez de receber o conteúdo serializado
+        paths = [str(path) for _, path, _ in to_parse]
+        if len(paths) > 1 and sum(os.path.getsize(path) for path in paths) >= PARALLEL_JSON_MIN_BYTES:
+            workers = min(len(paths), os.cpu_count() or 1)
+            # spawn: esta verificação roda em thread do pool e fork com threads ativas pode travar
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as executor:
+                parse_errors = list(executor.map(_validate_json, paths))
+        else:
+            parse_errors = [_validate_json(path) for path in paths]
+        
+        for (name, path, digest), error in zip(to_parse, parse_errors):
+            if error is None:
+                if digest is not None:
+                    known_hashes[str(path)] = digest
+                self.log_success(f"Arquivo {name} válido: {path.name}")
+            else:
+                known_hashes.pop(str(path), None)
+                self.log_error(f"Arquivo {name} tem JSON inválido: {error}")
+                all_found = False
+        
+        if use_hashes:
+            with self._lock:
+                self._cache["_json_hashes"] = known_hashes
+        
         return all_found
 
     def check_directories(self) -> bool:
@@ -221,9 +479,10 @@ class ETLValidator:
         ]
         
         all_ok = True
+        existing = _existing_paths([path for _, path in directories_to_check])
         
         for name, path in directories_to_check:
-            if path.exists():
+            if path in existing:
                 if os.access(path, os.W_OK):
                     self.log_success(f"Diretório {name} OK: {path}")
                 else:
@@ -241,8 +500,9 @@ class ETLValidator:
     def test_script_help(self, script_path: Path, script_name: str) -> bool:
         """Testa se um script responde ao --help"""
         try:
+            command = _HELP_COMMANDS.get(script_path) or [sys.executable, str(script_path), "--help"]
             result = subprocess.run(
-                [sys.executable, str(script_path), "--help"],
+                command,
                 capture_output=True,
                 text=True,
                 timeout=10
@@ -264,26 +524,28 @@ class ETLValidator:
 
     def run_basic_tests(self) -> bool:
         """Executa testes básicos de funcionamento"""
-        base_dir = ROOT_PATH / "backend" / "api_btg"
-        
-        tests = [
-            (base_dir / "orquestrador_btg.py", "Orquestrador"),
-            (base_dir / "api_faas_portfolio.py", "Extração Portfolio"),
-            (base_dir / "api_faas_rentabilidade.py", "Extração Rentabilidade"),
-            (base_dir / "insert_db" / "insert_carteira.py", "Inserção Carteira"),
-            (base_dir / "insert_db" / "insert_rentabilidade.py", "Inserção Rentabilidade"),
-        ]
-        
         all_passed = True
+        found = _existing_paths([path for _, path in ETL_SCRIPTS])
         
-        for script_path, script_name in tests:
-            if script_path.exists():
-                if not self.test_script_help(script_path, script_name):
-                    all_passed = False
+        existing = []
+        for script_name, script_path in ETL_SCRIPTS:
+            if script_path in found:
+                existing.append((script_path, script_name))
             else:
                 self.log_error(f"Script {script_name} não encontrado para teste")
                 all_passed = False
         
+        # Cada --help é um interpretador novo (import a frio); disparar todos juntos
+        # limita a etapa ao script mais lento em vez da soma
+        if existing:
+            # Threads novas não herdam o contexto: cada teste roda numa cópia dele para
+            # que as mensagens caiam no buffer desta verificação
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=len(existing)) as executor:
+                results = executor.map(lambda test: context.copy().run(self.test_script_help, *test), existing)
+                if not all(list(results)):
+                    all_passed = False
+        
         return all_passed
 
     def generate_report(self) -> Dict[str, Any]:
@@ -300,9 +562,9 @@ class ETLValidator:
                 "overall_status": "PASS" if len(self.errors) == 0 else "FAIL"
             },
             "details": {
-                "successes": self.success_checks,
-                "warnings": self.warnings,
-                "errors": self.errors
+                "successes": list(self.success_checks),
+                "warnings": list(self.warnings),
+                "errors": list(self.errors)
             }
         }
         
@@ -324,64 +586,93 @@ class ETLValidator:
             ("Testes Básicos", self.run_basic_tests),
         ]
         
-        for check_name, check_function in checks:
-            logger.info(f"\n🔸 Executando: {check_name}")
-            try:
-                check_function()
-            except Exception as e:
-                self.log_error(f"Erro durante {check_name}: {e}")
+        # As verificações são independentes e quase só esperam I/O (stat, subprocess,
+        # MySQL), então rodam em paralelo: o tempo total fica próximo da mais lenta.
+        # Cada verificação tem seu buffer de log, emitido sob o próprio cabeçalho ao concluir
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            futures = {}
+            for check_name, check_function in checks:
+                buffer: List[Tuple[int, str]] = []
+                future = executor.submit(self._run_check_buffered, buffer, check_name, check_function)
+                futures[future] = (check_name, buffer)
+            
+            for future in as_completed(futures):
+                check_name, buffer = futures[future]
+                logger.info(f"\n🔸 Executando: {check_name}")
+                try:
+                    future.result()
+                except Exception as e:
+                    self.log_error(f"Erro durante {check_name}: {e}")
+                self.flush_logs(buffer)
+                self.flush_logs()
         
         # Gerar relatório
         report = self.generate_report()
         
-        # Mostrar resumo
-        print(f"\n{'='*60}")
-        print(f"📋 RELATÓRIO DE VALIDAÇÃO - ETL BTG")
-        print(f"{'='*60}")
-        print(f"✅ Sucessos: {report['summary']['successes']}")
-        print(f"⚠️  Avisos: {report['summary']['warnings']}")
-        print(f"❌ Erros: {report['summary']['errors']}")
-        print(f"🎯 Status Geral: {report['summary']['overall_status']}")
-        print(f"{'='*60}\n")
+        # Mostrar resumo (montado inteiro e escrito de uma vez)
+        summary = report['summary']
+        lines = [
+            f"\n{'='*60}\n",
+            "📋 RELATÓRIO DE VALIDAÇÃO - ETL BTG\n",
+            f"{'='*60}\n",
+            f"✅ Sucessos: {summary['successes']}\n",
+            f"⚠️  Avisos: {summary['warnings']}\n",
+            f"❌ Erros: {summary['errors']}\n",
+            f"🎯 Status Geral: {summary['overall_status']}\n",
+            f"{'='*60}\n\n",
+        ]
         
         if self.errors:
-            print("❌ ERROS ENCONTRADOS:")
-            for error in self.errors:
-                print(f"   • {error}")
-            print()
+            lines.append("❌ ERROS ENCONTRADOS:\n")
+            lines.extend(f"   • {error}\n" for error in self.errors)
+            lines.append("\n")
         
         if self.warnings:
-            print("⚠️  AVISOS:")
-            for warning in self.warnings:
-                print(f"   • {warning}")
-            print()
+            lines.append("⚠️  AVISOS:\n")
+            lines.extend(f"   • {warning}\n" for warning in self.warnings)
+            lines.append("\n")
+        
+        sys.stdout.write("".join(lines))
         
         return len(self.errors) == 0
 
 def main():
+    _bootstrap()
     parser = argparse.ArgumentParser(description="Validação e Diagnóstico do ETL BTG")
     parser.add_argument('--json-output', type=str, help='Salvar relatório em arquivo JSON')
     parser.add_argument('--quick', action='store_true', help='Executar apenas verificações rápidas')
+    parser.add_argument('--with-counts', action='store_true',
+                        help='Contar registros exatos das tabelas (SELECT COUNT(*), lento em tabelas grandes)')
+    parser.add_argument('--trust-seconds', type=int, default=0,
+                        help='Reaproveita verificações locais aprovadas há menos de N segundos '
+                             'se os arquivos envolvidos não mudaram (padrão: 0 = desativado)')
     args = parser.parse_args()
     
-    validator = ETLValidator()
+    validator = ETLValidator(with_counts=args.with_counts, trust_seconds=args.trust_seconds)
     
     if args.quick:
         logger.info("🏃 Executando validação rápida...")
-        success = (
-            validator.check_python_version() and
-            validator.check_required_packages() and
-            validator.check_environment_variables() and
-            validator.check_script_files()
+        quick_checks = (
+            ("Versão Python", validator.check_python_version),
+            ("Pacotes Python", validator.check_required_packages),
+            ("Variáveis de Ambiente", validator.check_environment_variables),
+            ("Scripts", validator.check_script_files),
         )
+        # all() com gerador mantém a parada na primeira falha
+        success = all(validator.run_check(name, check) for name, check in quick_checks)
+        validator.flush_logs()
     else:
         success = validator.run_full_validation()
     
+    validator.save_cache()
+    
     # Salvar relatório em JSON se solicitado
     if args.json_output:
         report = validator.generate_report()
-        with open(args.json_output, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            Path(args.json_output).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        else:
+            Path(args.json_output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
         logger.info(f"📄 Relatório salvo em: {args.json_output}")
     
     # Código de saída
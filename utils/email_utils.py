@@ -54,13 +54,18 @@ class EmailSender:
         smtp_server: str, 
         port: int, 
         username: str, 
-        password: str
+        password: str,
+        keepalive: bool = False
     ) -> None:
         """
         Inicializa o sender com credenciais SMTP.
+        Com keepalive=True a conexão autenticada é reaproveitada entre envios
+        até close() ser chamado.
         """
         # Usar dataclass para validação como sugerido no guia
         self.config = EmailConfig(smtp_server, port, username, password)
+        self.keepalive = keepalive
+        self._server: Optional[smtplib.SMTP] = None
         
         # Validação do formato de email
         if not self._validate_email_address(username):
@@ -130,6 +135,47 @@ class EmailSender:
             logger.warning(f"Erro ao renderizar template '{template_path}': {e}")
             return None
     
+    def _connect(self) -> smtplib.SMTP:
+        """
+        Abre uma conexão SMTP autenticada.
+        """
+        server = smtplib.SMTP(self.config.smtp_server, self.config.port, timeout=10)
+        try:
+            server.starttls()
+            server.login(self.config.username, self.config.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    def _get_server(self) -> smtplib.SMTP:
+        """
+        Retorna a conexão mantida (keepalive), reabrindo-a se o servidor a encerrou.
+        """
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except smtplib.SMTPException:
+                pass
+            self.close()
+        
+        self._server = self._connect()
+        return self._server
+    
+    def close(self) -> None:
+        """
+        Encerra a conexão mantida pelo modo keepalive, se houver.
+        """
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            self._server.close()
+        finally:
+            self._server = None
+    
     def test_connection(self) -> bool:
         """
         Testa a conexão com o servidor SMTP.
@@ -211,16 +257,19 @@ class EmailSender:
                 self._attach_files(msg, attachments)
             
             # Enviar o email
-            with smtplib.SMTP(self.config.smtp_server, self.config.port, timeout=10) as server:
-                server.starttls()
-                server.login(self.config.username, self.config.password)
-                server.send_message(msg)
+            if self.keepalive:
+                self._get_server().send_message(msg)
+            else:
+                with self._connect() as server:
+                    server.send_message(msg)
             
             logger.info(f"Email enviado com sucesso para {', '.join(to)}: {subject}")
             return True
             
         except Exception as e:
             logger.warning(f"Erro ao enviar email: {e}")
+            if self.keepalive:
+                self.close()
             return False
     
     def _attach_files(
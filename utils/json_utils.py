@@ -9,6 +9,7 @@ Description: Utilitários para carregamento de arquivos JSON e validação de sc
 import json
 import re
 from enum import Enum
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Generator, Set, Union
 import pandas as pd
 from pydantic import BaseModel, Field, validator
@@ -361,4 +362,23 @@ def parse_metrics_from_output(output: str) -> Dict[str, Any]:
     try:
         return json.loads(texto_json)
     except json.JSONDecodeError:
-        return {}
\ No newline at end of file
+        return {}
+
+
+def emit_metrics(metrics: Dict[str, Any], metrics_out: Optional[str] = None, **dumps_kwargs) -> None:
+    """
+    Publica as métricas finais de um script filho.
+
+    Mantém a impressão no stdout (última linha, consumida por parse_metrics_from_output)
+    e, se metrics_out for informado, grava o mesmo JSON nesse arquivo para que o
+    orquestrador possa lê-lo diretamente sem varrer a saída capturada.
+    """
+    payload = json.dumps(metrics, ensure_ascii=False, **dumps_kwargs)
+    if metrics_out:
+        try:
+            destino = Path(metrics_out)
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            destino.write_text(payload, encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar métricas em {metrics_out}: {e}")
+    print(payload)
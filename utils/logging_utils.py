@@ -20,7 +20,7 @@ import time
 from typing import Any, Optional, TextIO, Dict, List, Union, ContextManager, TypeVar, cast
 from enum import IntEnum
 from datetime import datetime
-from logging.handlers import RotatingFileHandler, QueueHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, MemoryHandler
 from queue import Queue
 import logging.config
 from contextlib import contextmanager
@@ -82,6 +82,7 @@ class Log:
         self._format_string = '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
         self._file_handler = None
         self._console_handler = None
+        self._memory_handler = None
         
         # Atributos para logging assíncrono
         self._async_enabled = False
@@ -284,6 +285,43 @@ class Log:
             else:
                 instance._async_enabled = enabled
     
+    @staticmethod
+    def set_file_buffer(capacity: int = 512, flush_level: LogLevel = LogLevel.ERROR) -> None:
+        """
+        Bufferiza em memória os registros destinados ao arquivo de log.
+        
+        Os registros são gravados em lote a cada `capacity` entradas, ao registrar
+        algo com nível >= flush_level ou no encerramento do programa.
+        
+        Args:
+            capacity: Número de registros acumulados antes da gravação. Use 0 para
+                      voltar à escrita direta.
+            flush_level: Nível que força a gravação imediata do buffer
+        """
+        instance = Log._get_instance()
+        
+        with instance._lock:
+            # No modo assíncrono o arquivo é escrito pelo QueueListener
+            if instance._async_enabled or instance._file_handler is None:
+                return
+            
+            root_logger = logging.getLogger()
+            
+            if instance._memory_handler is not None:
+                instance._memory_handler.flush()
+                root_logger.removeHandler(instance._memory_handler)
+                instance._memory_handler = None
+                root_logger.addHandler(instance._file_handler)
+            
+            if capacity > 0:
+                root_logger.removeHandler(instance._file_handler)
+                instance._memory_handler = MemoryHandler(
+                    capacity,
+                    flushLevel=flush_level,
+                    target=instance._file_handler
+                )
+                root_logger.addHandler(instance._memory_handler)
+    
     @staticmethod
     def _configure_logging_system(max_size_mb: Optional[float] = 5.0) -> None:
         """
@@ -834,5 +872,12 @@ class Log:
                             handler.close()
                         except Exception:
                             pass
+                
+                # Com buffer ativo o handler de arquivo não está no logger raiz
+                if instance._memory_handler is not None and instance._file_handler is not None:
+                    try:
+                        instance._file_handler.close()
+                    except Exception:
+                        pass
 
 
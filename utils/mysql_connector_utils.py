@@ -608,8 +608,8 @@ class MySQLConnector:
         # Cria os placeholders para a query de valores individuais
         value_placeholder = f"({', '.join(['%s'] * len(columns))})"
         
-        # Converte o DataFrame para uma lista de tuplas
-        values = [tuple(row) for row in df.values]
+        # Converte o DataFrame para uma lista de tuplas nativas (sem promoção de tipos)
+        values = list(df.itertuples(index=False, name=None))
         total_rows = len(values)
         
         # Registra operação
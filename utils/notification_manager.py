@@ -165,6 +165,9 @@ class TemplateNotification(BaseModel):
         
         return v
 
+# Templates Jinja já compilados: caminho -> (mtime_ns, template)
+_TEMPLATE_CACHE: Dict[Path, Tuple[int, JinjaTemplate]] = {}
+
 def render_template(template_path: str, context: Dict[str, Any]) -> Optional[str]:
     """
     Renderiza um template com Jinja2 usando o contexto fornecido.
@@ -182,14 +185,20 @@ def render_template(template_path: str, context: Dict[str, Any]) -> Optional[str
 
     try:
         path = Path(template_path).resolve()
-        if not path.exists():
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+        except FileNotFoundError:
             logger.warning(f"Template nao encontrado: {path}")
             return None
 
-        with open(path, 'r', encoding='utf-8') as f:
-            raw_template = f.read()
-            template = JinjaTemplate(raw_template)
-            return template.render(**context)
+        # Recompila apenas se o arquivo mudou desde o último uso
+        cached = _TEMPLATE_CACHE.get(path)
+        if cached is None or cached[0] != mtime_ns:
+            with open(path, 'r', encoding='utf-8') as f:
+                cached = (mtime_ns, JinjaTemplate(f.read()))
+            _TEMPLATE_CACHE[path] = cached
+
+        return cached[1].render(**context)
 
     except Exception as e:
         logger.error(f"Erro ao renderizar template '{template_path}': {e}")
@@ -200,13 +209,16 @@ class NotificationManager:
     Gerencia o envio de notificações por diferentes canais.
     """
     
-    def __init__(self, log_config: Optional[Union[LogConfig, Dict]] = None):
+    def __init__(self, log_config: Optional[Union[LogConfig, Dict]] = None, smtp_keepalive: bool = False):
         """
         Inicializa o gerenciador de notificações.
         
         Args:
             log_config: Configuração de logging (objeto LogConfig ou dicionário)
+            smtp_keepalive: Reaproveita a conexão SMTP entre envios (chame close() ao final)
         """
+        self.smtp_keepalive = smtp_keepalive
+        
         # Converte configuração dict para objeto Pydantic se necessário
         if log_config is None:
             self.log_config = LogConfig()
@@ -292,7 +304,8 @@ class NotificationManager:
                     smtp_server=self.email_credentials.server,
                     port=self.email_credentials.port,
                     username=self.email_credentials.username,
-                    password=self.email_credentials.password
+                    password=self.email_credentials.password,
+                    keepalive=self.smtp_keepalive
                 )
                 logger.info("EmailSender inicializado com sucesso")
 
@@ -303,6 +316,13 @@ class NotificationManager:
             logger.error(f"Erro ao configurar EmailSender: {e}")
             self.email_sender = None
 
+    def close(self) -> None:
+        """
+        Libera a conexão SMTP mantida quando smtp_keepalive está ativo.
+        """
+        if self.email_sender:
+            self.email_sender.close()
+
     def is_ready(self) -> bool:
         """
         Verifica se o gerenciador está pronto para enviar notificações.
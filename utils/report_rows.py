@@ -0,0 +1,66 @@
+"""
+File: report_rows.py
+Author: Álvaro – Equipe Data Analytics – Catalise Investimentos
+Date: 2025-06-01
+Version: 1.0
+Description: Montagem das linhas de detalhamento (carteira/extrato) do relatório de email do orquestrador BTG.
+"""
+
+from typing import Any, Dict, List
+
+# Status mais comuns do detalhamento -> status_text do template (demais caem na busca por substring)
+STATUS_MAP = {
+    "OK": "success",
+    "SUCESSO": "success",
+    "IGNORADO": "skipped",
+    "SEM DADOS": "skipped",
+    "FALHA": "failure",
+    "ERRO": "failure",
+}
+# Busca por substring, em ordem, para status compostos (ex.: "SUCESSO PARCIAL")
+_STATUS_SUBSTRINGS = (
+    ("SUCESSO", "success"),
+    ("IGNORADO", "skipped"),
+    ("SEM DADOS", "skipped"),
+)
+
+
+def classify_status(status: Any) -> str:
+    """Converte o status do detalhamento no status_text do template (success/skipped/failure)."""
+    status_full = str(status).strip().upper()
+    status_text = STATUS_MAP.get(status_full)
+    if status_text is not None:
+        return status_text
+    for needle, label in _STATUS_SUBSTRINGS:
+        if needle in status_full:
+            return label
+    return "failure"
+
+
+def build_processing_rows(raw_detalhamento: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Transforma detalhamento em formato compatível com template."""
+    # Poucos status distintos se repetem em todas as linhas: cada um é classificado uma vez
+    labels: Dict[Any, str] = {}
+    rows: List[Dict[str, Any]] = []
+    for item in raw_detalhamento:
+        status = item.get("Status", "")
+        status_text = labels.get(status)
+        if status_text is None:
+            status_text = labels[status] = classify_status(status)
+
+        if status_text == "skipped":
+            total = inserted = duration = "-"
+        else:
+            total = item.get("Total Linhas", 0)
+            inserted = item.get("Inseridos", 0)
+            duration = item.get("Duração (s)", 0)
+
+        rows.append({
+            "fundo": item.get("Arquivo", ""),
+            "date": item.get("Data Processo", ""),
+            "total": total,
+            "inserted": inserted,
+            "duration": duration,
+            "status_text": status_text
+        })
+    return rows